@@ -1,18 +1,25 @@
 import os
+import queue
 import random
+import shutil
+import uuid
 
 import librosa
 import soundfile as sf
 import torch
 from speechbrain.pretrained import EncoderClassifier
-from torch.multiprocessing import Manager
 from torch.multiprocessing import Process
 from torch.utils.data import Dataset
 from torchaudio.transforms import Resample
 from tqdm import tqdm
 
+from Preprocessing.AudioPreprocessor import AudioPreprocessor
 from Preprocessing.EnCodecAudioPreprocessor import CodecAudioPreprocessor
 from Preprocessing.TextFrontend import ArticulatoryCombinedTextFrontend
+from Preprocessing.TextFrontend import compact_phonemes_to_aligner_ids
+from Preprocessing.TextFrontend import text_vectors_to_compact_phonemes
+from Utility.FeatureStore import FeatureStore
+from Utility.FeatureStore import FeatureStoreWriter
 from Utility.storage_config import MODELS_DIR
 
 
@@ -31,7 +38,10 @@ class CodecAlignerDataset(Dataset):
                  phone_input=False,
                  allow_unknown_symbols=False,
                  gpu_count=1,
-                 rank=0):
+                 rank=0,
+                 precompute_mels=False,
+                 save_waves=False,
+                 shard_across_ranks=True):
         self.gpu_count = gpu_count
         self.rank = rank
         if not os.path.exists(os.path.join(cache_dir, "aligner_train_cache.pt")) or rebuild_cache:
@@ -46,21 +56,40 @@ class CodecAlignerDataset(Dataset):
                                       phone_input=phone_input,
                                       allow_unknown_symbols=allow_unknown_symbols,
                                       gpu_count=gpu_count,
-                                      rank=rank)
+                                      rank=rank,
+                                      rebuild_cache=rebuild_cache,
+                                      save_waves=save_waves)
         self.lang = lang
         self.device = device
         self.cache_dir = cache_dir
-        self.tf = ArticulatoryCombinedTextFrontend(language=self.lang)
         cache = torch.load(os.path.join(self.cache_dir, "aligner_train_cache.pt"), map_location='cpu')
         self.speaker_embeddings = cache[2]
         self.datapoints = cache[0]
-        if self.gpu_count > 1:
+        if len(self.datapoints) > 0 and self.datapoints[0][0].size(1) != 2:
+            print("converting the articulatory vectors of an older cache to compact phonemes...")
+            self.datapoints = [(text_vectors_to_compact_phonemes(text), codes) for text, codes in self.datapoints]
+        mel_store_path = os.path.join(self.cache_dir, "aligner_mels")
+        if precompute_mels and not FeatureStore.exists(mel_store_path):
+            if self.gpu_count == 1:
+                self._build_mel_store(mel_store_path, device)
+            else:
+                print("Please precompute the spectrograms using only a single GPU. Falling back to computing them during training.")
+        self.mel_store = None
+        self.mel_store_offset = 0
+        if FeatureStore.exists(mel_store_path):
+            self.mel_store = FeatureStore(mel_store_path)
+            if len(self.mel_store) != len(self.datapoints):
+                print("The precomputed spectrograms don't match the cache, so they will be ignored.")
+                self.mel_store = None
+        if self.gpu_count > 1 and shard_across_ranks:
             # we only keep a chunk of the dataset in memory to avoid redundancy. Which chunk, we figure out using the rank.
+            # If the training uses a distributed sampler, every process needs the full dataset instead.
             while len(self.datapoints) % self.gpu_count != 0:
                 self.datapoints.pop(-1)  # a bit unfortunate, but if you're using multiple GPUs, you probably have a ton of datapoints anyway.
             chunksize = int(len(self.datapoints) / self.gpu_count)
             self.datapoints = self.datapoints[chunksize * self.rank:chunksize * (self.rank + 1)]
             self.speaker_embeddings = self.speaker_embeddings[chunksize * self.rank:chunksize * (self.rank + 1)]
+            self.mel_store_offset = chunksize * self.rank
         print(f"Loaded an Aligner dataset with {len(self.datapoints)} datapoints from {cache_dir}.")
 
     def _build_dataset_cache(self,
@@ -75,92 +104,218 @@ class CodecAlignerDataset(Dataset):
                              phone_input=False,
                              allow_unknown_symbols=False,
                              gpu_count=1,
-                             rank=0
+                             rank=0,
+                             rebuild_cache=False,
+                             samples_per_shard=500,
+                             save_waves=False
                              ):
         if gpu_count != 1:
             import sys
             print("Please run the feature extraction using only a single GPU. Multi-GPU is only supported for training.")
             sys.exit()
         os.makedirs(cache_dir, exist_ok=True)
+        for store in ["aligner_mels", "aligner_waves"]:
+            for store_file in [f"{store}.bin", f"{store}_index.npy", f"{store}.json"]:
+                if os.path.exists(os.path.join(cache_dir, store_file)):
+                    os.remove(os.path.join(cache_dir, store_file))  # features of a previous cache would no longer match
+        # every worker flushes its results to small shard files as it goes, so an interrupted run can pick up where it left off.
+        shard_dir = os.path.join(cache_dir, "aligner_cache_shards")
+        if rebuild_cache and os.path.exists(shard_dir):
+            shutil.rmtree(shard_dir)
+        os.makedirs(shard_dir, exist_ok=True)
         if type(path_to_transcript_dict) != dict:
             path_to_transcript_dict = path_to_transcript_dict()  # in this case we passed a function instead of the dict, so that the function isn't executed if not necessary.
         torch.multiprocessing.set_start_method('spawn', force=True)
-        resource_manager = Manager()
-        self.path_to_transcript_dict = resource_manager.dict(path_to_transcript_dict)
-        key_list = list(self.path_to_transcript_dict.keys())
+        key_list = list(path_to_transcript_dict.keys())
         with open(os.path.join(cache_dir, "files_used.txt"), encoding='utf8', mode="w") as files_used_note:
             files_used_note.write(str(key_list))
+        already_processed = set()
+        for shard in load_shards(shard_dir):
+            already_processed.update(shard["processed"])
+        if len(already_processed) > 0:
+            print(f"... resuming from {len(already_processed)} files that have already been processed ...")
+            key_list = [key for key in key_list if key not in already_processed]
         fisher_yates_shuffle(key_list)
         # build cache
         print("... building dataset cache ...")
-        self.result_pool = resource_manager.list()
-        # make processes
-        key_splits = list()
-        process_list = list()
-        for i in range(loading_processes):
-            key_splits.append(
-                key_list[i * len(key_list) // loading_processes:(i + 1) * len(key_list) // loading_processes])
-        for key_split in key_splits:
-            process_list.append(
-                Process(target=self._cache_builder_process,
-                        args=(key_split,
-                              lang,
-                              min_len_in_seconds,
-                              max_len_in_seconds,
-                              verbose,
-                              device,
-                              phone_input,
-                              allow_unknown_symbols),
-                        daemon=True))
-            process_list[-1].start()
-        for process in process_list:
-            process.join()
-        print("pooling results...")
-        pooled_datapoints = list()
-        for chunk in self.result_pool:
-            for datapoint in chunk:
-                pooled_datapoints.append(datapoint)  # unpack into a joint list
-        self.result_pool = pooled_datapoints
-        del pooled_datapoints
-        print("converting text to tensors...")
-        text_tensors = [torch.ShortTensor(x[0]) for x in self.result_pool]  # turn everything back to tensors (had to turn it to np arrays to avoid multiprocessing issues)
-        print("converting speech to tensors...")
-        speech_tensors = [torch.ShortTensor(x[1]) for x in self.result_pool]
-        print("converting waves to tensors...")
-        norm_waves = [torch.Tensor(x[2]) for x in self.result_pool]
-        print("unpacking file list...")
-        filepaths = [x[3] for x in self.result_pool]
-        del self.result_pool
-        self.datapoints = list(zip(text_tensors, speech_tensors))
-        del text_tensors
-        del speech_tensors
-        print("done!")
+        if len(key_list) > 0:
+            # the CPU heavy preprocessing happens in producer processes, the models that run on the device live only in this process
+            sample_queue = torch.multiprocessing.Queue(maxsize=samples_per_shard)
+            key_splits = list()
+            process_list = list()
+            for i in range(loading_processes):
+                key_splits.append(
+                    key_list[i * len(key_list) // loading_processes:(i + 1) * len(key_list) // loading_processes])
+            for key_split in key_splits:
+                if len(key_split) == 0:
+                    continue
+                process_list.append(
+                    Process(target=self._cache_builder_process,
+                            args=({path: path_to_transcript_dict[path] for path in key_split},  # every worker gets its own part of the transcripts, so there is no need to share them between processes
+                                  lang,
+                                  min_len_in_seconds,
+                                  max_len_in_seconds,
+                                  verbose,
+                                  phone_input,
+                                  allow_unknown_symbols,
+                                  sample_queue),
+                            daemon=True))
+                process_list[-1].start()
+            self._cache_consumer(sample_queue=sample_queue,
+                                 process_list=process_list,
+                                 total=len(key_list),
+                                 device=device,
+                                 shard_dir=shard_dir,
+                                 samples_per_shard=samples_per_shard,
+                                 save_waves=save_waves)
+            for process in process_list:
+                process.join()
 
-        # add speaker embeddings
+        print("pooling results...")
+        self.datapoints = list()
         self.speaker_embeddings = list()
-        speaker_embedding_func_ecapa = EncoderClassifier.from_hparams(source="speechbrain/spkrec-ecapa-voxceleb",
-                                                                      run_opts={"device": str(device)},
-                                                                      savedir=os.path.join(MODELS_DIR, "Embedding", "speechbrain_speaker_embedding_ecapa"))
-        with torch.inference_mode():
-            for wave in tqdm(norm_waves):
-                self.speaker_embeddings.append(speaker_embedding_func_ecapa.encode_batch(wavs=wave.to(device).unsqueeze(0)).squeeze().cpu())
+        filepaths = list()
+        # the normalized waves can be kept, so that the TTS features can be extracted from them rather than from the decoded codes
+        wave_store = None
+        if save_waves and all(FeatureStore.exists(shard_path[:-3] + "_waves") for shard_path in list_shards(shard_dir)):
+            wave_store = FeatureStoreWriter(os.path.join(cache_dir, "aligner_waves"), feature_dim=1, dtype="float32")
+        dropped_datapoints = 0
+        for shard_path in list_shards(shard_dir):
+            shard = torch.load(shard_path, map_location='cpu')
+            shard_waves = FeatureStore(shard_path[:-3] + "_waves") if wave_store is not None else None
+            for index, (datapoint, speaker_embedding) in enumerate(zip(shard["datapoints"], shard["speaker_embeddings"])):
+                if datapoint[2] not in path_to_transcript_dict:
+                    # the shard comes from an interrupted run with a different transcript dict, so this file isn't part of the corpus anymore
+                    dropped_datapoints += 1
+                    continue
+                self.datapoints.append((torch.ShortTensor(datapoint[0]), torch.ShortTensor(datapoint[1])))  # turn everything back to tensors (had to turn it to np arrays to avoid multiprocessing issues)
+                filepaths.append(datapoint[2])
+                self.speaker_embeddings.append(speaker_embedding)
+                if shard_waves is not None:
+                    wave_store.append(shard_waves[index])
+        if dropped_datapoints > 0:
+            print(f"... left out {dropped_datapoints} previously processed files that are no longer in the transcript dict ...")
+        if wave_store is not None:
+            wave_store.close()
+        print("done!")
 
         # save to cache
         if len(self.datapoints) == 0:
             raise RuntimeError  # something went wrong and there are no datapoints
         torch.save((self.datapoints, None, self.speaker_embeddings, filepaths),
                    os.path.join(cache_dir, "aligner_train_cache.pt"))
+        shutil.rmtree(shard_dir)  # the shards are only needed until the complete cache is on disk
+
+    @torch.inference_mode()
+    def _build_mel_store(self, mel_store_path, device, batch_size=16):
+        """
+        decodes the codec indexes once and stores the spectrograms that the training would otherwise compute in every step
+        """
+        print("... precomputing spectrograms ...")
+        ap = CodecAudioPreprocessor(input_sr=-1, device=device)
+        spectrogram_extractor = AudioPreprocessor(input_sr=16000, output_sr=16000, device=device)
+        mel_store = FeatureStoreWriter(mel_store_path, feature_dim=128)
+        for batch_start in tqdm(range(0, len(self.datapoints), batch_size)):
+            batch_of_codes = list()
+            for _, codes in self.datapoints[batch_start:batch_start + batch_size]:
+                if codes.size()[0] != 24:  # no clue why this is sometimes the case
+                    codes = codes.transpose(0, 1)
+                batch_of_codes.append(codes)
+            padded_codes = torch.nn.utils.rnn.pad_sequence([codes.transpose(0, 1) for codes in batch_of_codes], batch_first=True).transpose(1, 2)
+            waves = ap.indexes_batch_to_audio(padded_codes.int(), lengths=[codes.size(1) for codes in batch_of_codes])
+            for speech in waves:
+                mel_store.append(spectrogram_extractor.audio_to_mel_spec_tensor(speech, explicit_sampling_rate=16000).transpose(0, 1))
+        mel_store.close()
+
+    def _cache_consumer(self,
+                        sample_queue,
+                        process_list,
+                        total,
+                        device,
+                        shard_dir,
+                        samples_per_shard,
+                        save_waves):
+        ap = CodecAudioPreprocessor(input_sr=16000, device=device)
+        speaker_embedding_func_ecapa = EncoderClassifier.from_hparams(source="speechbrain/spkrec-ecapa-voxceleb",
+                                                                      run_opts={"device": str(device)},
+                                                                      savedir=os.path.join(MODELS_DIR, "Embedding", "speechbrain_speaker_embedding_ecapa"))
+        silence = torch.zeros([16000 // 4], device=device)
+        finished_producers = 0
+        processed_paths = list()
+        pending_samples = list()
+        progress = tqdm(total=total)
+        while finished_producers < len(process_list):
+            try:
+                item = sample_queue.get(timeout=60)
+            except queue.Empty:
+                if not any(process.is_alive() for process in process_list):
+                    print("All producer processes have stopped unexpectedly, saving what we have so far.")
+                    break
+                continue
+            if item is None:
+                finished_producers += 1
+                continue
+            path, sample = item
+            processed_paths.append(path)  # also files that we skip count as processed, so we don't try them again after resuming
+            progress.update(1)
+            if sample is not None:
+                pending_samples.append((path, *sample))
+            if len(processed_paths) >= samples_per_shard:
+                self._write_shard(pending_samples, processed_paths, ap, speaker_embedding_func_ecapa, silence, device, shard_dir, save_waves)
+                processed_paths = list()
+                pending_samples = list()
+        progress.close()
+        if len(processed_paths) > 0:
+            self._write_shard(pending_samples, processed_paths, ap, speaker_embedding_func_ecapa, silence, device, shard_dir, save_waves)
+
+    @torch.inference_mode()
+    def _write_shard(self, pending_samples, processed_paths, ap, speaker_embedding_func_ecapa, silence, device, shard_dir, save_waves, batch_size=16):
+        # the codes and the speaker embeddings are computed in batches of similar length, so that there is as little padding as possible
+        datapoints = [None] * len(pending_samples)
+        normalized_waves = [None] * len(pending_samples)
+        speaker_embeddings = [None] * len(pending_samples)
+        order_by_length = sorted(range(len(pending_samples)), key=lambda i: len(pending_samples[i][2]))
+        for batch_start in range(0, len(order_by_length), batch_size):
+            batch_indexes = order_by_length[batch_start:batch_start + batch_size]
+            waves = [torch.tensor(pending_samples[i][2], device=device) for i in batch_indexes]
+            wave_lengths = torch.tensor([len(wave) for wave in waves], device=device, dtype=torch.float32)
+
+            waves_with_silence = [torch.cat([silence, wave, silence]) for wave in waves]
+            batch_of_codes = ap.audio_batch_to_codebook_indexes(audio_batch=torch.nn.utils.rnn.pad_sequence(waves_with_silence, batch_first=True),
+                                                                lengths=[len(wave) for wave in waves_with_silence],
+                                                                current_sampling_rate=16000)
+
+            padded_waves = torch.nn.utils.rnn.pad_sequence(waves, batch_first=True)
+            batch_of_embeddings = speaker_embedding_func_ecapa.encode_batch(wavs=padded_waves, wav_lens=wave_lengths / wave_lengths.max()).squeeze(1).cpu()
+
+            for i, codes, embedding, wave in zip(batch_indexes, batch_of_codes, batch_of_embeddings, waves_with_silence):
+                path, cached_text, _ = pending_samples[i]
+                datapoints[i] = [cached_text, codes.transpose(0, 1).cpu().numpy(), path]
+                speaker_embeddings[i] = embedding
+                if save_waves:
+                    normalized_waves[i] = wave.cpu()
+        pending_samples.clear()  # the waves are not needed anymore
+
+        shard_name = uuid.uuid4().hex
+        if save_waves:
+            # the waves go into a store next to the shard, which has to be complete before the shard itself is saved
+            wave_store = FeatureStoreWriter(os.path.join(shard_dir, f"{shard_name}_waves"), feature_dim=1, dtype="float32")  # in full precision, since pitch and energy are extracted from them
+            for wave in normalized_waves:
+                wave_store.append(wave)
+            wave_store.close()
+        save_shard({"datapoints": datapoints, "processed": processed_paths, "speaker_embeddings": speaker_embeddings},
+                   os.path.join(shard_dir, f"{shard_name}.pt"))
 
     def _cache_builder_process(self,
-                               path_list,
+                               path_to_transcript_dict,
                                lang,
                                min_len,
                                max_len,
                                verbose,
-                               device,
                                phone_input,
-                               allow_unknown_symbols):
-        process_internal_dataset_chunk = list()
+                               allow_unknown_symbols,
+                               sample_queue):
+        torch.set_num_threads(1)  # there are many producers running in parallel, so each one should only use a single thread
         torch.hub._validate_not_a_forked_repo = lambda a, b, c: True  # torch 1.9 has a bug in the hub loading, this is a workaround
         # careful: assumes 16kHz or 8kHz audio
         silero_model, utils = torch.hub.load(repo_or_dir='snakers4/silero-vad',
@@ -175,88 +330,84 @@ class CodecAlignerDataset(Dataset):
          collect_chunks) = utils
         torch.set_grad_enabled(True)  # finding this issue was very infuriating: silero sets
         # this to false globally during model loading rather than using inference mode or no_grad
-        silero_model = silero_model.to(device)
-        silence = torch.zeros([16000 // 4], device=device)
         tf = ArticulatoryCombinedTextFrontend(language=lang)
+        path_list = list(path_to_transcript_dict.keys())
         _, sr = sf.read(path_list[0])
         assumed_sr = sr
-        ap = CodecAudioPreprocessor(input_sr=assumed_sr, device=device)
-        resample = Resample(orig_freq=assumed_sr, new_freq=16000).to(device)
+        resample = Resample(orig_freq=assumed_sr, new_freq=16000)
 
-        for path in tqdm(path_list):
-            if self.path_to_transcript_dict[path].strip() == "":
-                continue
-
-            try:
-                wave, sr = sf.read(path)
-            except:
-                print(f"Problem with an audio file: {path}")
-                continue
+        for path in path_list:
+            sample = None
+            try:  # whatever happens to the sample, the consumer has to know that this path has been processed
+                if path_to_transcript_dict[path].strip() == "":
+                    continue
+                try:
+                    wave, sr = sf.read(path)
+                except:
+                    print(f"Problem with an audio file: {path}")
+                    continue
 
-            if len(wave.shape) > 1:  # the audio is in stereo, so we need to merge the channels.
-                if len(wave[0]) == 2:  # let's figure out whether the axes are switched, which seems to be the case sometimes
-                    wave = wave.transpose()  # if yes, we switch the axes into the order librosa's to_mono function expects.
-            wave = librosa.to_mono(wave)
+                if len(wave.shape) > 1:  # the audio is in stereo, so we need to merge the channels.
+                    if len(wave[0]) == 2:  # let's figure out whether the axes are switched, which seems to be the case sometimes
+                        wave = wave.transpose()  # if yes, we switch the axes into the order librosa's to_mono function expects.
+                wave = librosa.to_mono(wave)
 
-            if sr != assumed_sr:
-                assumed_sr = sr
-                ap = CodecAudioPreprocessor(input_sr=assumed_sr, device=device)
-                resample = Resample(orig_freq=assumed_sr, new_freq=16000).to(device)
-                print(f"{path} has a different sampling rate --> adapting the codec processor")
+                if sr != assumed_sr:
+                    assumed_sr = sr
+                    resample = Resample(orig_freq=assumed_sr, new_freq=16000)
+                    print(f"{path} has a different sampling rate --> adapting the resampler")
 
-            try:
-                norm_wave = resample(torch.tensor(wave).float().to(device))
-            except ValueError:
-                continue
-            dur_in_seconds = len(norm_wave) / 16000
-            if not (min_len <= dur_in_seconds <= max_len):
-                if verbose:
-                    print(f"Excluding {path} because of its duration of {round(dur_in_seconds, 2)} seconds.")
-                continue
+                try:
+                    norm_wave = resample(torch.tensor(wave).float())
+                except ValueError:
+                    continue
+                dur_in_seconds = len(norm_wave) / 16000
+                if not (min_len <= dur_in_seconds <= max_len):
+                    if verbose:
+                        print(f"Excluding {path} because of its duration of {round(dur_in_seconds, 2)} seconds.")
+                    continue
 
-            # remove silences from front and back, then add constant 1/4th second silences back to front and back
-            with torch.no_grad():
-                speech_timestamps = get_speech_timestamps(norm_wave, silero_model, sampling_rate=16000)
-            try:
-                result = norm_wave[speech_timestamps[0]['start']:speech_timestamps[-1]['end']]
-            except IndexError:
-                print("Audio might be too short to cut silences from front and back.")
-                continue
-            wave = torch.cat([silence, result, silence])
+                # remove silences from front and back, the consumer adds constant 1/4th second silences back to front and back
+                with torch.no_grad():
+                    speech_timestamps = get_speech_timestamps(norm_wave, silero_model, sampling_rate=16000)
+                try:
+                    result = norm_wave[speech_timestamps[0]['start']:speech_timestamps[-1]['end']]
+                except IndexError:
+                    print("Audio might be too short to cut silences from front and back.")
+                    continue
 
-            # raw audio preprocessing is done
-            transcript = self.path_to_transcript_dict[path]
+                # raw audio preprocessing is done
+                transcript = path_to_transcript_dict[path]
 
-            try:
                 try:
-                    cached_text = tf.string_to_tensor(transcript, handle_missing=False, input_phonemes=phone_input).squeeze(0).cpu().numpy()
+                    try:
+                        cached_text = text_vectors_to_compact_phonemes(tf.string_to_tensor(transcript, handle_missing=False, input_phonemes=phone_input).squeeze(0)).numpy()
+                    except KeyError:
+                        cached_text = text_vectors_to_compact_phonemes(tf.string_to_tensor(transcript, handle_missing=True, input_phonemes=phone_input).squeeze(0)).numpy()
+                        if not allow_unknown_symbols:
+                            continue  # we skip sentences with unknown symbols
+                except ValueError:
+                    # this can happen for Mandarin Chinese, when the syllabification of pinyin doesn't work. In that case, we just skip the sample.
+                    continue
                 except KeyError:
-                    cached_text = tf.string_to_tensor(transcript, handle_missing=True, input_phonemes=phone_input).squeeze(0).cpu().numpy()
-                    if not allow_unknown_symbols:
-                        continue  # we skip sentences with unknown symbols
-            except ValueError:
-                # this can happen for Mandarin Chinese, when the syllabification of pinyin doesn't work. In that case, we just skip the sample.
-                continue
-            except KeyError:
-                # this can happen for Mandarin Chinese, when the syllabification of pinyin doesn't work. In that case, we just skip the sample.
-                continue
+                    # this can happen for Mandarin Chinese, when the syllabification of pinyin doesn't work. In that case, we just skip the sample.
+                    continue
 
-            cached_speech = ap.audio_to_codebook_indexes(audio=wave, current_sampling_rate=16000).transpose(0, 1).cpu().numpy()
-            process_internal_dataset_chunk.append([cached_text,
-                                                   cached_speech,
-                                                   result.cpu().detach().numpy(),
-                                                   path])
-        self.result_pool.append(process_internal_dataset_chunk)
+                sample = (cached_text, result.detach().numpy())
+            finally:
+                sample_queue.put((path, sample))
+        sample_queue.put(None)  # tells the consumer that this producer is done
 
     def __getitem__(self, index):
-        text_vector = self.datapoints[index][0]
-        tokens = self.tf.text_vectors_to_id_sequence(text_vector=text_vector)
-        tokens = torch.LongTensor(tokens)
+        tokens = compact_phonemes_to_aligner_ids(self.datapoints[index][0])
         token_len = torch.LongTensor([len(tokens)])
 
-        codes = self.datapoints[index][1]
-        if codes.size()[0] != 24:  # no clue why this is sometimes the case
-            codes = codes.transpose(0, 1)
+        if self.mel_store is not None:
+            codes = self.mel_store[self.mel_store_offset + index]  # precomputed spectrogram instead of the codec indexes
+        else:
+            codes = self.datapoints[index][1]
+            if codes.size()[0] != 24:  # no clue why this is sometimes the case
+                codes = codes.transpose(0, 1)
 
         return tokens, \
                token_len, \
@@ -267,8 +418,29 @@ class CodecAlignerDataset(Dataset):
     def __len__(self):
         return len(self.datapoints)
 
+    def get_lengths(self):
+        """
+        the amount of codec frames of every datapoint, so batches of similar length can be formed without loading anything
+        """
+        return [codes.size(1) if codes.size(0) == 24 else codes.size(0) for _, codes in self.datapoints]
+
 
 def fisher_yates_shuffle(lst):
     for i in range(len(lst) - 1, 0, -1):
         j = random.randint(0, i)
         lst[i], lst[j] = lst[j], lst[i]
+
+
+def save_shard(shard, path):
+    # write to a temporary file first and then move it into place, so a crash never leaves a half written shard behind
+    torch.save(shard, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def list_shards(shard_dir):
+    return sorted(os.path.join(shard_dir, shard) for shard in os.listdir(shard_dir) if shard.endswith(".pt"))
+
+
+def load_shards(shard_dir):
+    for shard_path in list_shards(shard_dir):
+        yield torch.load(shard_path, map_location='cpu')
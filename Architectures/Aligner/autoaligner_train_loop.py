@@ -12,6 +12,16 @@ from Architectures.Aligner.Aligner import Aligner
 from Architectures.Aligner.Reconstructor import Reconstructor
 from Preprocessing.AudioPreprocessor import AudioPreprocessor
 from Preprocessing.EnCodecAudioPreprocessor import CodecAudioPreprocessor
+from Utility.BatchPrefetcher import BatchPrefetcher
+from Utility.LengthBucketSampler import DistributedLengthBucketBatchSampler
+from Utility.LengthBucketSampler import LengthBucketBatchSampler
+from Utility.LengthBucketSampler import get_dataset_lengths
+from Utility.StepProfiler import PhaseTimer
+from Utility.StepProfiler import get_trace_profiler
+from Utility.StepProfiler import print_phase_times
+from Utility.utils import average_losses
+from Utility.utils import get_autocast_dtype
+from Utility.utils import speech_batch_to_mels
 
 
 def collate_and_pad(batch):
@@ -35,7 +45,9 @@ def train_loop(train_dataset,
                use_reconstruction=True,
                gpu_count=1,
                rank=0,
-               steps_per_checkpoint=None):
+               steps_per_checkpoint=None,
+               use_length_buckets=False,
+               precision="fp32"):
     """
     Args:
         resume: whether to resume from the most recent checkpoint
@@ -48,13 +60,14 @@ def train_loop(train_dataset,
         batch_size: How many elements should be loaded at once
         debug_img_path: where to put images of the training progress if desired
         use_reconstruction: whether to use the auxiliary reconstruction procedure/loss, which can make the alignment sharper
+        gpu_count: with more than one GPU, the dataset should not be sharded across the ranks, a distributed sampler takes care of that
+        use_length_buckets: whether to put samples of similar length into the same batch, so less compute is wasted on padding
+        precision: fp32, bf16 or fp16. With the mixed precision options, the CTC loss is still computed in fp32
     """
     os.makedirs(save_directory, exist_ok=True)
     torch.multiprocessing.set_sharing_strategy('file_system')
     torch.multiprocessing.set_start_method('spawn', force=True)
 
-    if steps_per_checkpoint is None:
-        steps_per_checkpoint = len(train_dataset) // batch_size
     ap = CodecAudioPreprocessor(input_sr=-1, device=device)  # only used to transform features into continuous matrices
     spectrogram_extractor = AudioPreprocessor(input_sr=16000, output_sr=16000, device=device)
 
@@ -64,24 +77,40 @@ def train_loop(train_dataset,
     tiny_tts = Reconstructor().to(device)
     optim_tts = RAdam(tiny_tts.parameters(), lr=0.0001)
 
+    # the forward passes go through the wrappers, so that the gradients are synchronized across the GPUs.
+    # Everything else (loading, saving, the CTC loss) uses the underlying modules.
+    asr_net = asr_model
+    tts_net = tiny_tts
+    train_sampler = None
     if gpu_count > 1:
         asr_model.to(rank)
         tiny_tts.to(rank)
-        asr_model = torch.nn.parallel.DistributedDataParallel(
+        asr_net = torch.nn.parallel.DistributedDataParallel(
             asr_model,
             device_ids=[rank],
             output_device=rank,
             find_unused_parameters=True,
-        ).module
-        tiny_tts = torch.nn.parallel.DistributedDataParallel(
+        )
+        tts_net = torch.nn.parallel.DistributedDataParallel(
             tiny_tts,
             device_ids=[rank],
             output_device=rank,
             find_unused_parameters=True,
-        ).module
+        )
         torch.distributed.barrier()
-    train_sampler = torch.utils.data.RandomSampler(train_dataset)
-    batch_sampler_train = torch.utils.data.BatchSampler(train_sampler, batch_size, drop_last=True)
+        # every process holds the full dataset and the sampler decides which process gets which samples
+        if use_length_buckets:
+            batch_sampler_train = DistributedLengthBucketBatchSampler(get_dataset_lengths(train_dataset), batch_size)
+        else:
+            train_sampler = torch.utils.data.distributed.DistributedSampler(train_dataset, shuffle=True)
+            batch_sampler_train = torch.utils.data.BatchSampler(train_sampler, batch_size, drop_last=True)
+    elif use_length_buckets:
+        batch_sampler_train = LengthBucketBatchSampler(get_dataset_lengths(train_dataset), batch_size)
+    else:
+        train_sampler = torch.utils.data.RandomSampler(train_dataset)
+        batch_sampler_train = torch.utils.data.BatchSampler(train_sampler, batch_size, drop_last=True)
+    if steps_per_checkpoint is None:
+        steps_per_checkpoint = len(batch_sampler_train)
 
     train_loader = DataLoader(dataset=train_dataset,
                               num_workers=0,  # unfortunately necessary for big data due to mmap errors
@@ -89,6 +118,11 @@ def train_loop(train_dataset,
                               prefetch_factor=None,
                               collate_fn=collate_and_pad)
 
+    asr_parameters = list(asr_model.parameters())
+    tts_parameters = list(tiny_tts.parameters())
+    autocast_dtype = get_autocast_dtype(precision, device)
+    grad_scaler = torch.cuda.amp.GradScaler(enabled=autocast_dtype == torch.float16)
+
     step_counter = 0
     loss_sum = list()
 
@@ -104,36 +138,41 @@ def train_loop(train_dataset,
         if not fine_tune:
             optim_asr.load_state_dict(check_dict["optimizer"])
             optim_tts.load_state_dict(check_dict["tts_optimizer"])
+            if "grad_scaler" in check_dict:
+                grad_scaler.load_state_dict(check_dict["grad_scaler"])
             step_counter = check_dict["step_counter"]
             if step_counter > steps:
                 print("Desired steps already reached in loaded checkpoint.")
                 return
     start_time = time.time()
 
+    phase_timer = PhaseTimer(device)
+    profiler = get_trace_profiler(os.path.join(save_directory, "profiler_trace"))
+    profiler.start()
+    epoch = 0
     while True:
+        if isinstance(train_sampler, torch.utils.data.distributed.DistributedSampler):
+            train_sampler.set_epoch(epoch)  # otherwise every epoch would see the same order
+        epoch += 1
         asr_model.train()
         tiny_tts.train()
-        for batch in tqdm(train_loader):
+        for batch in tqdm(BatchPrefetcher(train_loader, device)):  # the next batches are assembled and moved to the GPU while the current step computes
+            phase_timer.mark("data fetch")
             tokens = batch[0].to(device)
             tokens_len = batch[1].to(device)
             speaker_embeddings = batch[4].to(device)
 
-            mels = list()
-            mel_lengths = list()
-            for datapoint in batch[2]:
-                with torch.inference_mode():
-                    # extremely unfortunate that we have to do this over here, but multiprocessing and this don't go together well
-                    speech = ap.indexes_to_audio(datapoint.int().to(device))
-                    mel = spectrogram_extractor.audio_to_mel_spec_tensor(speech, explicit_sampling_rate=16000).transpose(0, 1).cpu()
-                speech_len = torch.LongTensor([len(mel)])
-                mels.append(mel.clone())
-                mel_lengths.append(speech_len)
+            # extremely unfortunate that we have to do this over here, but multiprocessing and this don't go together well
+            mels = speech_batch_to_mels(batch[2], ap, spectrogram_extractor)
+            mel_lengths = [torch.LongTensor([len(mel)]) for mel in mels]
             mel = pad_sequence(mels, batch_first=True).to(device)
             mel_len = torch.stack(mel_lengths).squeeze(1).to(device)
+            phase_timer.mark("codec decoding and mel extraction")
 
-            pred = asr_model(mel, mel_len)
+            with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                pred = asr_net(mel, mel_len)
 
-            ctc_loss = asr_model.ctc_loss(pred.transpose(0, 1).log_softmax(2),
+            ctc_loss = asr_model.ctc_loss(pred.float().transpose(0, 1).log_softmax(2),  # the CTC loss is numerically sensitive, so it stays in full precision
                                           tokens,
                                           mel_len,
                                           tokens_len)
@@ -141,26 +180,35 @@ def train_loop(train_dataset,
             if use_reconstruction:
                 speaker_embeddings_expanded = torch.nn.functional.normalize(speaker_embeddings).unsqueeze(1).expand(-1, pred.size(1), -1)
                 tts_lambda = min([0.1, step_counter / 10000])  # super simple schedule
-                reconstruction_loss = tiny_tts(x=torch.cat([pred, speaker_embeddings_expanded], dim=-1),
-                                               # combine ASR prediction with speaker embeddings to allow for reconstruction loss on multiple speakers
-                                               lens=mel_len,
-                                               ys=mel) * tts_lambda  # reconstruction loss to make the states more distinct
+                with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                    reconstruction_loss = tts_net(x=torch.cat([pred, speaker_embeddings_expanded.to(pred.dtype)], dim=-1),
+                                                  # combine ASR prediction with speaker embeddings to allow for reconstruction loss on multiple speakers
+                                                  lens=mel_len,
+                                                  ys=mel) * tts_lambda  # reconstruction loss to make the states more distinct
                 loss = ctc_loss + reconstruction_loss
             else:
                 loss = ctc_loss
+            phase_timer.mark("forward")
 
             optim_asr.zero_grad()
             if use_reconstruction:
                 optim_tts.zero_grad()
-            loss.backward()
-            torch.nn.utils.clip_grad_norm_(asr_model.parameters(), 1.0)
+            grad_scaler.scale(loss).backward()
+            phase_timer.mark("backward")
+            grad_scaler.unscale_(optim_asr)
+            torch.nn.utils.clip_grad_norm_(asr_parameters, 1.0)
             if use_reconstruction:
-                torch.nn.utils.clip_grad_norm_(tiny_tts.parameters(), 1.0)
-            optim_asr.step()
+                grad_scaler.unscale_(optim_tts)
+                torch.nn.utils.clip_grad_norm_(tts_parameters, 1.0)
+            grad_scaler.step(optim_asr)
             if use_reconstruction:
-                optim_tts.step()
+                grad_scaler.step(optim_tts)
+            grad_scaler.update()
+            phase_timer.mark("optimizer step")
+            profiler.step()
 
-            loss_sum.append(loss.item())
+            if rank == 0:
+                loss_sum.append(loss.detach())  # only read back when the checkpoint is written, so the device isn't synchronized in every step. The other processes don't log, so they don't need to collect it.
             step_counter += 1
 
             if step_counter % steps_per_checkpoint == 0 and rank == 0:
@@ -170,12 +218,14 @@ def train_loop(train_dataset,
                     "optimizer"    : optim_asr.state_dict(),
                     "tts_model"    : tiny_tts.state_dict(),
                     "tts_optimizer": optim_tts.state_dict(),
+                    "grad_scaler"  : grad_scaler.state_dict(),
                     "step_counter" : step_counter,
                 },
                     os.path.join(save_directory, "aligner.pt"))
-                print("Total Loss:   {}".format(round(sum(loss_sum) / len(loss_sum), 3)))
+                print("Total Loss:   {}".format(round(average_losses(loss_sum), 3)))
                 print("Time elapsed: {} Minutes".format(round((time.time() - start_time) / 60)))
                 print("Steps:        {}".format(step_counter))
+                print_phase_times(phase_timer.summary())
                 if debug_img_path is not None:
                     asr_model.inference(features=mel[0][:mel_len[0]],
                                         tokens=tokens[0][:tokens_len[0]],
@@ -183,6 +233,8 @@ def train_loop(train_dataset,
                                         train=True)  # for testing
                 asr_model.train()
                 loss_sum = list()
+            phase_timer.mark("checkpointing")
 
         if step_counter > steps and step_counter % steps_per_checkpoint == 0:
+            profiler.stop()
             return
@@ -6,7 +6,6 @@
 
 import math
 
-import numpy
 import torch
 from torch import nn
 
@@ -79,7 +78,7 @@ class MultiHeadedAttention(nn.Module):
         n_batch = value.size(0)
         if mask is not None:
             mask = mask.unsqueeze(1).eq(0)  # (batch, 1, *, time2)
-            min_value = float(numpy.finfo(torch.tensor(0, dtype=scores.dtype).numpy().dtype).min)
+            min_value = torch.finfo(scores.dtype).min  # no detour over numpy, which also doesn't know bfloat16
             scores = scores.masked_fill(mask, min_value)
             self.attn = torch.softmax(scores, dim=-1).masked_fill(mask, 0.0)  # (batch, head, time1, time2)
         else:
@@ -3,6 +3,7 @@ Taken from ESPNet, but heavily modified
 """
 
 import torch
+from torch.utils.checkpoint import checkpoint
 
 from Architectures.GeneralLayers.Attention import RelPositionMultiHeadedAttention
 from Architectures.GeneralLayers.ConditionalLayerNorm import AdaIN1d
@@ -64,8 +65,13 @@ class Conformer(torch.nn.Module):
 
         if self.use_output_norm:
             self.output_norm = LayerNorm(attention_dim)
+            if utt_embed is not None and conformer_type == "encoder":
+                # the utterance embedding integration replaces the output norm of the encoder. It only stays for compatibility with existing checkpoints,
+                # so it has to be excluded from training, otherwise distributed training would have to search for unused parameters in every step.
+                self.output_norm.requires_grad_(False)
         self.utt_embed = utt_embed
         self.conformer_type = conformer_type
+        self.activation_checkpointing = False  # if enabled, the activations within the blocks are recomputed in the backward pass instead of being stored
         self.use_conditional_layernorm_embedding_integration = embedding_integration in ["AdaIN", "ConditionalLayerNorm"]
         if utt_embed is not None:
             if conformer_type == "encoder":  # the encoder gets an additional conditioning signal added to its output
@@ -143,7 +149,10 @@ class Conformer(torch.nn.Module):
                 else:
                     if self.conformer_type != "encoder":
                         xs = integrate_with_utt_embed(hs=xs, utt_embeddings=utterance_embedding, projection=self.decoder_embedding_projections[encoder_index], embedding_training=self.use_conditional_layernorm_embedding_integration)
-            xs, masks = encoder(xs, masks)
+            if self.activation_checkpointing and self.training and torch.is_grad_enabled():
+                xs, masks = checkpoint(encoder, xs, masks, use_reentrant=False)
+            else:
+                xs, masks = encoder(xs, masks)
 
         if isinstance(xs, tuple):
             xs = xs[0]
@@ -6,8 +6,6 @@ from abc import ABC
 
 import torch
 
-from Utility.utils import pad_list
-
 
 class LengthRegulator(torch.nn.Module, ABC):
     """
@@ -34,13 +32,15 @@ class LengthRegulator(torch.nn.Module, ABC):
         super(LengthRegulator, self).__init__()
         self.pad_value = pad_value
 
-    def forward(self, xs, ds, alpha=1.0):
+    def forward(self, xs, ds, alpha=1.0, max_length=None):
         """
         Calculate forward propagation.
         Args:
             xs (Tensor): Batch of sequences of char or phoneme embeddings (B, Tmax, D).
             ds (LongTensor): Batch of durations of each frame (B, T).
             alpha (float, optional): Alpha value to control speed of speech.
+            max_length (int, optional): Length of the output. If not given, it is the longest
+                sum of durations, which has to be read back from the device to find out.
         Returns:
             Tensor: replicated input tensor based on durations (B, T*, D).
         """
@@ -49,13 +49,16 @@ class LengthRegulator(torch.nn.Module, ABC):
             assert alpha > 0
             ds = torch.round(ds.float() * alpha).long()
 
-        if ds.sum() == 0:
-            ds[ds.sum(dim=1).eq(0)] = 1
-
-        return pad_list([self._repeat_one_sequence(x, d) for x, d in zip(xs, ds)], self.pad_value)
+        # if there are no durations at all, every token gets one frame (without reading the sum back from the device)
+        ds = torch.where(ds.sum().eq(0), torch.ones_like(ds), ds)
 
-    def _repeat_one_sequence(self, x, d):
-        """
-        Repeat each frame according to duration
-        """
-        return torch.repeat_interleave(x, d, dim=0)
+        # every frame looks up the token it belongs to, so the whole batch is expanded at once instead of one sequence at a time
+        ends_of_tokens = torch.cumsum(ds, dim=1)
+        if max_length is None:
+            max_length = int(ends_of_tokens[:, -1].max())
+        frame_positions = torch.arange(max_length, device=ds.device).unsqueeze(0).expand(ds.size(0), -1).contiguous()
+        token_indexes = torch.searchsorted(ends_of_tokens.contiguous(), frame_positions, right=True)
+        padding = token_indexes >= ds.size(1)  # frames after the end of a sequence
+        token_indexes = token_indexes.clamp(max=ds.size(1) - 1)
+        expanded = torch.gather(xs, 1, token_indexes.unsqueeze(-1).expand(-1, -1, xs.size(-1)))
+        return expanded.masked_fill(padding.unsqueeze(-1), self.pad_value)
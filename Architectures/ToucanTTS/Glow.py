@@ -4,6 +4,7 @@ import torch
 import torch.distributions as dist
 from torch import nn
 from torch.nn import functional as F
+from torch.utils.checkpoint import checkpoint
 
 from Architectures.ToucanTTS import glow_utils
 from Architectures.ToucanTTS.wavenet import WN
@@ -307,6 +308,7 @@ class Glow(nn.Module):
         self.text_condition_channels = text_condition_channels
         self.share_cond_layers = share_cond_layers
         self.prior_dist = dist.Normal(0, 1)
+        self.activation_checkpointing = False  # if enabled, the activations within the coupling blocks are recomputed in the backward pass instead of being stored
         self.g_proj = condition_integration_projection
         if text_condition_channels != 0 and share_cond_layers:
             cond_layer = torch.nn.Conv1d(text_condition_channels * n_sqz, 2 * hidden_channels * n_layers, 1)
@@ -380,7 +382,10 @@ class Glow(nn.Module):
         if self.share_cond_layers and g is not None:
             g = self.cond_layer(g)
         for f in flows:
-            x, logdet = f(x, x_mask, g=g, reverse=reverse)
+            if self.activation_checkpointing and isinstance(f, CouplingBlock) and self.training and torch.is_grad_enabled():
+                x, logdet = checkpoint(f, x, x_mask, g=g, reverse=reverse, use_reentrant=False)
+            else:
+                x, logdet = f(x, x_mask, g=g, reverse=reverse)
             if return_hiddens:
                 hs.append(x)
             logdet_tot += logdet
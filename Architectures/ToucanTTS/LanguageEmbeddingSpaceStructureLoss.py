@@ -1,6 +1,7 @@
 import os.path
 import pickle
 
+import numpy
 import torch
 
 from Preprocessing.multilinguality.create_distance_lookups import CacheCreator
@@ -9,66 +10,83 @@ from Utility.utils import load_json_from_path
 
 class LanguageEmbeddingSpaceStructureLoss(torch.nn.Module):
 
-    def __init__(self):
+    def __init__(self, cache_root="Preprocessing/multilinguality"):
         super().__init__()
-        cc = CacheCreator(cache_root="Preprocessing/multilinguality")
-        if not os.path.exists('Preprocessing/multilinguality/lang_1_to_lang_2_to_tree_dist.json'):
-            cc.create_tree_cache(cache_root="Preprocessing/multilinguality")
-        if not os.path.exists('Preprocessing/multilinguality/lang_1_to_lang_2_to_tree_dist.json'):
-            cc.create_map_cache(cache_root="Preprocessing/multilinguality")
-        if not os.path.exists("Preprocessing/multilinguality/asp_dict.pkl"):
-            print("download asp file")  # TODO downloader script with release
-
-        self.tree_dist = load_json_from_path('Preprocessing/multilinguality/lang_1_to_lang_2_to_tree_dist.json')
-        self.map_dist = load_json_from_path('Preprocessing/multilinguality/lang_1_to_lang_2_to_map_dist.json')
-        with open("Preprocessing/multilinguality/asp_dict.pkl", 'rb') as dictfile:
-            self.asp_sim = pickle.load(dictfile)
-        self.lang_list = list(self.asp_sim.keys())  # list of all languages, to get lang_b's index
-
-        self.largest_value_map_dist = 0.0
-        for _, values in self.map_dist.items():
-            for _, value in values.items():
-                self.largest_value_map_dist = max(self.largest_value_map_dist, value)
-
-        self.iso_codes_to_ids = load_json_from_path("Preprocessing/multilinguality/iso_lookup.json")[-1]
+        self.iso_codes_to_ids = load_json_from_path(os.path.join(cache_root, "iso_lookup.json"))[-1]
         self.ids_to_iso_codes = {v: k for k, v in self.iso_codes_to_ids.items()}
 
+        # the average of the tree, map and ASP distance between every pair of language IDs. It's looked up
+        # on the CPU, so the large matrix doesn't take up space on the GPU and no lookup needs a synchronization.
+        metric_distance_path = os.path.join(cache_root, "language_id_to_language_id_to_metric_dist.npy")
+        if not os.path.exists(metric_distance_path):
+            numpy.save(metric_distance_path, self.create_metric_distance_matrix(cache_root))
+        self.metric_distances = torch.from_numpy(numpy.load(metric_distance_path))
+
+    def create_metric_distance_matrix(self, cache_root):
+        """
+        Collects the value range normalized distances of all pairs of languages from the lookups into dense matrices
+        that are indexed with the language IDs and averages them. Pairs for which any of the distances is unknown are NaN.
+        """
+        cc = CacheCreator(cache_root=cache_root)
+        if not os.path.exists(os.path.join(cache_root, "lang_1_to_lang_2_to_tree_dist.json")):
+            cc.create_tree_cache(cache_root=cache_root)
+        if not os.path.exists(os.path.join(cache_root, "lang_1_to_lang_2_to_map_dist.json")):
+            cc.create_map_cache(cache_root=cache_root)
+        if not os.path.exists(os.path.join(cache_root, "asp_dict.pkl")):
+            raise FileNotFoundError("asp_dict.pkl must be downloaded separately.")
+
+        print("Collecting the distances between all languages, this only needs to be done once...")
+        vocabulary_size = max(self.iso_codes_to_ids.values()) + 1
+
+        # the lookups only contain one direction of every pair, the other direction is filled in from the transpose
+        tree_dist = self._lookup_to_matrix(load_json_from_path(os.path.join(cache_root, "lang_1_to_lang_2_to_tree_dist.json")), vocabulary_size)
+        tree_dist = numpy.where(numpy.isnan(tree_dist), tree_dist.T, tree_dist)
+        map_dist = self._lookup_to_matrix(load_json_from_path(os.path.join(cache_root, "lang_1_to_lang_2_to_map_dist.json")), vocabulary_size)
+        map_dist = numpy.where(numpy.isnan(map_dist), map_dist.T, map_dist)
+        map_dist = map_dist / numpy.nanmax(map_dist)
+
+        with open(os.path.join(cache_root, "asp_dict.pkl"), 'rb') as dictfile:
+            asp_sim = pickle.load(dictfile)
+        asp_dist = numpy.full((vocabulary_size, vocabulary_size), numpy.nan, dtype=numpy.float32)
+        lang_list = list(asp_sim.keys())  # the order of the similarities in every entry of the asp dict
+        known_positions = [position for position, lang in enumerate(lang_list) if lang in self.iso_codes_to_ids]
+        known_ids = [self.iso_codes_to_ids[lang_list[position]] for position in known_positions]
+        for lang_1, similarities in asp_sim.items():
+            if lang_1 in self.iso_codes_to_ids:
+                asp_dist[self.iso_codes_to_ids[lang_1], known_ids] = 1.0 - numpy.asarray(similarities)[known_positions]  # it's a similarity measure that goes from 0 to 1, so we subtract it from 1 to turn it into a distance
+
+        return ((tree_dist + map_dist + asp_dist) / 3).astype(numpy.float32)
+
+    def _lookup_to_matrix(self, lang_1_to_lang_2_to_dist, vocabulary_size):
+        matrix = numpy.full((vocabulary_size, vocabulary_size), numpy.nan, dtype=numpy.float32)
+        for lang_1, lang_2_to_dist in lang_1_to_lang_2_to_dist.items():
+            if lang_1 not in self.iso_codes_to_ids:
+                continue
+            langs_2 = [lang_2 for lang_2 in lang_2_to_dist if lang_2 in self.iso_codes_to_ids]
+            matrix[self.iso_codes_to_ids[lang_1], [self.iso_codes_to_ids[lang_2] for lang_2 in langs_2]] = [lang_2_to_dist[lang_2] for lang_2 in langs_2]
+        return matrix
+
     def forward(self, language_ids, language_embeddings):
         """
         Args:
-            language_ids (Tensor): IDs of languages in the same order as the embeddings to calculate the distances according to the metrics.
+            language_ids (list or Tensor): IDs of languages in the same order as the embeddings to calculate the distances according to the metrics.
             language_embeddings (Tensor): Batch of language embeddings, of which the distances will be compared to the distances according to the metrics.
 
         Returns:
             Tensor: Language Embedding Structure Loss Value
         """
-
-        losses = list()
-        for language_id_1, language_embedding_1 in zip(language_ids, language_embeddings):
-            for language_id_2, language_embedding_2 in zip(language_ids, language_embeddings):
-                if language_id_1 != language_id_2:
-                    embed_dist = torch.nn.functional.l1_loss(language_embedding_1, language_embedding_2)
-                    lang_1 = self.ids_to_iso_codes[language_id_1]
-                    lang_2 = self.ids_to_iso_codes[language_id_2]
-
-                    # Value Range Normalized Tree Dist
-                    try:
-                        tree_dist = self.tree_dist[lang_1][lang_2]
-                    except KeyError:
-                        tree_dist = self.tree_dist[lang_2][lang_1]
-
-                    # Value Range Normalized Map Dist
-                    try:
-                        map_dist = self.map_dist[lang_1][lang_2] / self.largest_value_map_dist
-                    except KeyError:
-                        map_dist = self.map_dist[lang_2][lang_1] / self.largest_value_map_dist
-
-                    # Value Range Normalized ASP Dist
-                    lang_2_idx = self.lang_list.index(lang_2)
-                    asp_dist = 1.0 - self.asp_sim[lang_1][lang_2_idx]  # it's a similarity measure that goes from 0 to 1, so we subtract it from 1 to turn it into a distance
-
-                    # Average distance should be similar to embedding distance to bring some structure into the embedding-space
-                    metric_distance = (torch.tensor(tree_dist) + torch.tensor(map_dist) + torch.tensor(asp_dist)) / 3
-                    losses.append(torch.nn.functional.l1_loss(embed_dist, metric_distance))
-
-        return sum(losses) / len(losses)
\ No newline at end of file
+        language_ids = torch.as_tensor(language_ids, dtype=torch.long, device="cpu")
+        pair_mask = language_ids.unsqueeze(1) != language_ids.unsqueeze(0)
+        metric_distance = self.metric_distances[language_ids.unsqueeze(1), language_ids.unsqueeze(0)]
+        if torch.isnan(metric_distance[pair_mask]).any():
+            raise KeyError("The distance between some of the languages in the batch is unknown.")
+        metric_distance = torch.where(pair_mask, metric_distance, 0.0)
+        number_of_pairs = max(pair_mask.sum().item(), 1)  # counted on the CPU, so reading it back doesn't wait for the device
+
+        # the mean absolute difference between the embeddings of every pair, i.e. the L1 loss between them
+        embed_dist = torch.cdist(language_embeddings.float(), language_embeddings.float(), p=1) / language_embeddings.size(-1)
+
+        # Average distance should be similar to embedding distance to bring some structure into the embedding-space
+        pair_mask = pair_mask.to(language_embeddings.device)
+        losses = (embed_dist - metric_distance.to(language_embeddings.device)).abs() * pair_mask
+        return losses.sum() / number_of_pairs
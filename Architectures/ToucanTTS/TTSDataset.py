@@ -12,8 +12,14 @@ from Architectures.ToucanTTS.EnergyCalculator import EnergyCalculator
 from Architectures.ToucanTTS.PitchCalculator import Parselmouth
 from Preprocessing.AudioPreprocessor import AudioPreprocessor
 from Preprocessing.EnCodecAudioPreprocessor import CodecAudioPreprocessor
+from Preprocessing.TextFrontend import WORD_BOUNDARY_ID
+from Preprocessing.TextFrontend import compact_phonemes_to_aligner_ids
+from Preprocessing.TextFrontend import compact_phonemes_to_text_vectors
 from Preprocessing.TextFrontend import get_language_id
+from Preprocessing.TextFrontend import text_vectors_to_compact_phonemes
 from Preprocessing.articulatory_features import get_feature_to_index_lookup
+from Utility.FeatureStore import FeatureStore
+from Utility.FeatureStore import FeatureStoreWriter
 from Utility.utils import remove_elements
 
 
@@ -33,7 +39,8 @@ class TTSDataset(Dataset):
                  save_imgs=False,
                  gpu_count=1,
                  rank=0,
-                 annotate_silences=False):
+                 annotate_silences=False,
+                 precompute_mels=False):
         self.cache_dir = cache_dir
         self.device = device
         self.pttd = path_to_transcript_dict
@@ -52,12 +59,21 @@ class TTSDataset(Dataset):
                                       save_imgs=save_imgs,
                                       gpu_count=gpu_count,
                                       rank=rank,
-                                      annotate_silences=annotate_silences)
+                                      annotate_silences=annotate_silences,
+                                      precompute_mels=precompute_mels)
         self.cache_dir = cache_dir
         self.gpu_count = gpu_count
         self.rank = rank
         self.language_id = get_language_id(lang)
         self.datapoints = torch.load(os.path.join(self.cache_dir, "tts_train_cache.pt"), map_location='cpu')
+        if len(self.datapoints) > 0 and self.datapoints[0][0].size(1) != 2:
+            print("converting the articulatory vectors of an older cache to compact phonemes...")
+            for datapoint in self.datapoints:
+                datapoint[0] = text_vectors_to_compact_phonemes(datapoint[0])
+        self.mel_store = None
+        if len(self.datapoints) > 0 and len(self.datapoints[0]) > 9 and FeatureStore.exists(os.path.join(self.cache_dir, "tts_mels")):
+            # the datapoints know where their precomputed spectrogram is located in the feature store
+            self.mel_store = FeatureStore(os.path.join(self.cache_dir, "tts_mels"))
         if self.gpu_count > 1:
             # we only keep a chunk of the dataset in memory to avoid redundancy. Which chunk, we figure out using the rank.
             while len(self.datapoints) % self.gpu_count != 0:
@@ -80,7 +96,8 @@ class TTSDataset(Dataset):
                              save_imgs=False,
                              gpu_count=1,
                              rank=0,
-                             annotate_silences=False):
+                             annotate_silences=False,
+                             precompute_mels=False):
         if gpu_count != 1:
             import sys
             print("Please run the feature extraction using only a single GPU. Multi-GPU is only supported for training.")
@@ -93,10 +110,13 @@ class TTSDataset(Dataset):
                                 min_len_in_seconds=min_len_in_seconds,
                                 max_len_in_seconds=max_len_in_seconds,
                                 rebuild_cache=rebuild_cache,
-                                device=device)
+                                device=device,
+                                save_waves=True)
         datapoints = torch.load(os.path.join(cache_dir, "aligner_train_cache.pt"), map_location='cpu')
         # we use the aligner dataset as basis and augment it to contain the additional information we need for tts.
         self.dataset, _, speaker_embeddings, filepaths = datapoints
+        if len(self.dataset) > 0 and self.dataset[0][0].size(1) != 2:
+            self.dataset = [(text_vectors_to_compact_phonemes(text), codes) for text, codes in self.dataset]
 
         print("... building dataset cache ...")
         self.codec_wrapper = CodecAudioPreprocessor(input_sr=-1, device=device)
@@ -123,42 +143,88 @@ class TTSDataset(Dataset):
         parsel = Parselmouth(fs=16000)
         energy_calc = EnergyCalculator(fs=16000).to(device)
         self.dc = DurationCalculator()
+        mel_store = FeatureStoreWriter(os.path.join(cache_dir, "tts_mels"), feature_dim=128) if precompute_mels else None
         vis_dir = os.path.join(cache_dir, "duration_vis")
         if save_imgs:
             os.makedirs(os.path.join(vis_dir, "post_clean"), exist_ok=True)
             if annotate_silences:
                 os.makedirs(os.path.join(vis_dir, "pre_clean"), exist_ok=True)
 
-        for index in tqdm(range(len(self.dataset))):
+        wave_store_path = os.path.join(cache_dir, "aligner_waves")
+        wave_store = None
+        if FeatureStore.exists(wave_store_path):
+            wave_store = FeatureStore(wave_store_path)
+            if len(wave_store) != len(self.dataset):
+                wave_store = None
+        if wave_store is None:
+            print("No normalized waves from the aligner cache available, the codec indexes will be decoded instead.")
+
+        hop_length = int(self.codec_wrapper.model.hop_length)  # samples per codec frame
+
+        def load_wave(index):
             codes = self.dataset[index][1]
             if codes.size()[0] != 24:  # no clue why this is sometimes the case
                 codes = codes.transpose(0, 1)
-            decoded_wave = self.codec_wrapper.indexes_to_audio(codes.int().to(device))
-            decoded_wave_length = torch.LongTensor([len(decoded_wave)])
-            features = self.spec_extractor_for_features.audio_to_mel_spec_tensor(decoded_wave, explicit_sampling_rate=16000)
-            feature_lengths = torch.LongTensor([len(features[0])])
+            if wave_store is None:
+                return codes, self.codec_wrapper.indexes_to_audio(codes.int().to(device))
+            # the wave is padded to the length that decoding the codes would produce, so the spectrograms have exactly the same number of frames as the ones used in training
+            decoded_length = codes.size(1) * hop_length
+            wave = wave_store[index].view(-1)[:decoded_length]
+            return codes, torch.nn.functional.pad(wave, (0, decoded_length - len(wave))).to(device)
+
+        # first we only calculate the durations, since we need the CTC losses of all samples to find out which ones to keep.
+        alignment_results = list()
+        feature_lengths_of_all = list()
+        mel_store_indexes = dict()
+        for index in tqdm(range(len(self.dataset))):
+            codes, wave = load_wave(index)
+            wave_length = torch.LongTensor([len(wave)])
+            features = self.spec_extractor_for_features.audio_to_mel_spec_tensor(wave, explicit_sampling_rate=16000)
+            feature_lengths_of_all.append(torch.LongTensor([len(features[0])]))
+            if mel_store is not None and wave_store is None:
+                mel_store_indexes[index] = mel_store.append(features.transpose(0, 1))  # these already are the spectrograms of the decoded codes, so they are stored right away instead of being computed again
 
             text = self.dataset[index][0]
 
             if annotate_silences:
-                text = self._annotate_silences(text, get_speech_timestamps, index, vis_dir, decoded_wave, device, features, silero_model, save_imgs, decoded_wave_length)
+                text = self._annotate_silences(text, get_speech_timestamps, index, vis_dir, wave, device, features, silero_model, save_imgs, wave_length)
             cached_duration, ctc_loss = self._calculate_durations(text, index, os.path.join(vis_dir, "post_clean"), features, save_imgs)
+            alignment_results.append((text, cached_duration))
+            self.ctc_losses.append(ctc_loss)
+
+        indexes_to_keep = list(range(len(self.dataset)))
+        if ctc_selection and len(self.dataset) > 300:  # for less than 300 datapoints, we should not throw away anything.
+            # now we can filter out some bad datapoints based on the CTC scores we collected, before we spend any time on their pitch and energy
+            mean_ctc = sum(self.ctc_losses) / len(self.ctc_losses)
+            std_dev = statistics.stdev(self.ctc_losses)
+            threshold = mean_ctc + (std_dev * 3.5)
+            for index in range(len(self.ctc_losses)):
+                if self.ctc_losses[index] > threshold:
+                    indexes_to_keep.remove(index)
+                    print(f"Removing datapoint {index}, because the CTC loss is 3.5 standard deviations higher than the mean. \n ctc: {round(self.ctc_losses[index], 4)} vs. mean: {round(mean_ctc, 4)}")
 
-            cached_energy = energy_calc(input_waves=torch.tensor(decoded_wave).unsqueeze(0).to(device),
-                                        input_waves_lengths=decoded_wave_length,
+        # only the wave is needed again for the pitch and the energy, the spectrogram isn't
+        for index in tqdm(indexes_to_keep):
+            codes, wave = load_wave(index)
+            wave_length = torch.LongTensor([len(wave)])
+            feature_lengths = feature_lengths_of_all[index]
+            text, cached_duration = alignment_results[index]
+
+            cached_energy = energy_calc(input_waves=wave.unsqueeze(0),
+                                        input_waves_lengths=wave_length,
                                         feats_lengths=feature_lengths,
                                         text=text,
                                         durations=cached_duration.unsqueeze(0),
                                         durations_lengths=torch.LongTensor([len(cached_duration)]))[0].squeeze(0).cpu()
 
-            cached_pitch = parsel(input_waves=torch.tensor(decoded_wave).unsqueeze(0),
-                                  input_waves_lengths=decoded_wave_length,
+            cached_pitch = parsel(input_waves=wave.unsqueeze(0).cpu(),
+                                  input_waves_lengths=wave_length,
                                   feats_lengths=feature_lengths,
                                   text=text,
                                   durations=cached_duration.unsqueeze(0),
                                   durations_lengths=torch.LongTensor([len(cached_duration)]))[0].squeeze(0).cpu()
 
-            self.datapoints.append([text,  # text tensor
+            self.datapoints.append([text,  # text tensor (phoneme IDs and modifier bitfields)
                                     torch.LongTensor([len(text)]),  # length of text tensor
                                     codes,  # codec tensor (in index form)
                                     feature_lengths,  # length of spectrogram
@@ -168,21 +234,20 @@ class TTSDataset(Dataset):
                                     speaker_embeddings[index],  # speaker embedding,
                                     filepaths[index]  # path to the associated original raw audio file
                                     ])
-            self.ctc_losses.append(ctc_loss)
+            if mel_store is not None:
+                # the TTS learns to predict the spectrograms of the decoded codec indexes, which is also what the training computes when they aren't precomputed.
+                # The normalized waves are only used for the alignment, the pitch and the energy.
+                if index not in mel_store_indexes:
+                    features = self.spec_extractor_for_features.audio_to_mel_spec_tensor(self.codec_wrapper.indexes_to_audio(codes.int().to(device)), explicit_sampling_rate=16000)
+                    mel_store_indexes[index] = mel_store.append(features.transpose(0, 1))
+                self.datapoints[-1].append(mel_store_indexes[index])  # index of the precomputed spectrogram in the feature store
 
         # =============================
         # done with datapoint creation
         # =============================
 
-        if ctc_selection and len(self.datapoints) > 300:  # for less than 300 datapoints, we should not throw away anything.
-            # now we can filter out some bad datapoints based on the CTC scores we collected
-            mean_ctc = sum(self.ctc_losses) / len(self.ctc_losses)
-            std_dev = statistics.stdev(self.ctc_losses)
-            threshold = mean_ctc + (std_dev * 3.5)
-            for index in range(len(self.ctc_losses), 0, -1):
-                if self.ctc_losses[index - 1] > threshold:
-                    self.datapoints.pop(index - 1)
-                    print(f"Removing datapoint {index - 1}, because the CTC loss is 3.5 standard deviations higher than the mean. \n ctc: {round(self.ctc_losses[index - 1], 4)} vs. mean: {round(mean_ctc, 4)}")
+        if mel_store is not None:
+            mel_store.close()
 
         # save to cache
         if len(self.datapoints) > 0:
@@ -192,31 +257,34 @@ class TTSDataset(Dataset):
             print("No datapoints were prepared! Exiting...")
             sys.exit()
         del self.dataset
+        if wave_store is not None:
+            # the normalized waves are only kept around until the TTS features have been extracted from them
+            for store_file in [wave_store_path + ".bin", wave_store_path + "_index.npy", wave_store_path + ".json"]:
+                os.remove(store_file)
 
     def _annotate_silences(self, text, get_speech_timestamps, index, vis_dir, decoded_wave, device, features, silero_model, save_imgs, decoded_wave_length):
         """
         Takes in a text tensor and returns a text tensor with pauses added in all locations, where there are actually pauses in the speech signal. Unfortunately, this tends to make mistakes and not work quite as intended yet. I might revisit it in the future, if I see the need for extremely accurate labels for a small dataset of e.g. special data.
         """
+        text_vectors = compact_phonemes_to_text_vectors(text)
+        pause = text_vectors_to_compact_phonemes([[0.] * 16 + [1.] + [0.] * 45])[0]  # a vector with only the silence feature set
         text_with_pauses = list()
-        for phoneme_index, vector in enumerate(text):
+        for phoneme_index, phoneme in enumerate(text):
             # We add pauses before every word boundary, and later we remove the ones that were added too much
-            if vector[get_feature_to_index_lookup()["word-boundary"]] == 1:
-                if text[phoneme_index - 1][get_feature_to_index_lookup()["silence"]] != 1:
-                    text_with_pauses.append([0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 1., 0.,
-                                             0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0.,
-                                             0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0.,
-                                             0., 0., 0., 0., 0., 0., 0., 0.])
-                text_with_pauses.append(vector.numpy().tolist())
+            if phoneme[0] == WORD_BOUNDARY_ID:
+                if text_vectors[phoneme_index - 1][get_feature_to_index_lookup()["silence"]] != 1:
+                    text_with_pauses.append(pause)
+                text_with_pauses.append(phoneme)
             else:
-                text_with_pauses.append(vector.numpy().tolist())
-        text = torch.Tensor(text_with_pauses)
+                text_with_pauses.append(phoneme)
+        text = torch.stack(text_with_pauses)
 
         cached_duration, _ = self._calculate_durations(text, index, os.path.join(vis_dir, "pre_clean"), features, save_imgs)
 
         cumsum = 0
         potential_silences = list()
         phoneme_indexes_of_silences = list()
-        for phoneme_index, phone in enumerate(text):
+        for phoneme_index, phone in enumerate(compact_phonemes_to_text_vectors(text)):
             if phone[get_feature_to_index_lookup()["silence"]] == 1 or phone[get_feature_to_index_lookup()["end of sentence"]] == 1 or phone[get_feature_to_index_lookup()["questionmark"]] == 1 or phone[get_feature_to_index_lookup()["exclamationmark"]] == 1 or phone[get_feature_to_index_lookup()["fullstop"]] == 1:
                 potential_silences.append([cumsum, cumsum + cached_duration[phoneme_index]])
                 phoneme_indexes_of_silences.append(phoneme_index)
@@ -253,18 +321,13 @@ class TTSDataset(Dataset):
     def _calculate_durations(self, text, index, vis_dir, features, save_imgs):
         # We deal with the word boundaries by having 2 versions of text: with and without word boundaries.
         # We note the index of word boundaries and insert durations of 0 afterwards
-        text_without_word_boundaries = list()
-        indexes_of_word_boundaries = list()
-        for phoneme_index, vector in enumerate(text):
-            if vector[get_feature_to_index_lookup()["word-boundary"]] == 0:
-                text_without_word_boundaries.append(vector.numpy().tolist())
-            else:
-                indexes_of_word_boundaries.append(phoneme_index)
-        matrix_without_word_boundaries = torch.Tensor(text_without_word_boundaries)
+        indexes_of_word_boundaries = (text[:, 0] == WORD_BOUNDARY_ID).nonzero().squeeze(1).tolist()
+        tokens = compact_phonemes_to_aligner_ids(text)
 
         alignment_path, ctc_loss = self.acoustic_model.inference(features=features.transpose(0, 1),
-                                                                 tokens=matrix_without_word_boundaries.to(self.device),
+                                                                 tokens=tokens,
                                                                  save_img_for_debug=os.path.join(vis_dir, f"{index}.png") if save_imgs else None,
+                                                                 train=True,
                                                                  return_ctc=True)
 
         cached_duration = self.dc(torch.LongTensor(alignment_path), vis=None).cpu()
@@ -276,9 +339,13 @@ class TTSDataset(Dataset):
         return cached_duration, ctc_loss
 
     def __getitem__(self, index):
+        if self.mel_store is not None:
+            speech = self.mel_store[self.datapoints[index][9]]  # precomputed spectrogram instead of the codec indexes
+        else:
+            speech = self.datapoints[index][2]
         return self.datapoints[index][0], \
                self.datapoints[index][1], \
-               self.datapoints[index][2], \
+               speech, \
                self.datapoints[index][3], \
                self.datapoints[index][4], \
                self.datapoints[index][5], \
@@ -290,6 +357,12 @@ class TTSDataset(Dataset):
     def __len__(self):
         return len(self.datapoints)
 
+    def get_lengths(self):
+        """
+        the amount of spectrogram frames of every datapoint, so batches of similar length can be formed without loading anything
+        """
+        return [int(datapoint[3]) for datapoint in self.datapoints]
+
     def remove_samples(self, list_of_samples_to_remove):
         for remove_id in sorted(list_of_samples_to_remove, reverse=True):
             self.datapoints.pop(remove_id)
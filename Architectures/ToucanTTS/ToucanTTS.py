@@ -326,6 +326,11 @@ class ToucanTTS(torch.nn.Module):
                                                                                  gold_pitch=gold_pitch,
                                                                                  gold_energy=gold_energy)
 
+        if glow_loss is None:
+            # The flow doesn't contribute to the loss in this step, but distributed training expects gradients for all parameters
+            # in every step (unless it searches the graph for unused parameters, which is slow). So we anchor them with a weight of zero.
+            regression_loss = regression_loss + 0.0 * sum(parameter.sum() for parameter in self.post_flow.parameters())
+
         if return_feats:
             return regression_loss, glow_loss, duration_loss, pitch_loss, energy_loss, outs
         return regression_loss, glow_loss, duration_loss, pitch_loss, energy_loss
@@ -352,8 +357,9 @@ class ToucanTTS(torch.nn.Module):
             utterance_embedding = torch.nn.functional.normalize(utterance_embedding)
 
         # encoding the texts
-        text_masks = make_non_pad_mask(text_lengths, device=text_lengths.device).unsqueeze(-2)
-        padding_masks = make_pad_mask(text_lengths, device=text_lengths.device)
+        # the masks get their length from the padded tensors, so the lengths don't have to be read back from the device
+        text_masks = make_non_pad_mask(text_lengths, device=text_lengths.device, maxlen=text_tensors.size(1)).unsqueeze(-2)
+        padding_masks = make_pad_mask(text_lengths, device=text_lengths.device, maxlen=text_tensors.size(1))
         encoded_texts, _ = self.encoder(text_tensors, text_masks, utterance_embedding=utterance_embedding, lang_ids=lang_ids)
 
         if self.integrate_language_embedding_into_encoder_out:
@@ -388,10 +394,10 @@ class ToucanTTS(torch.nn.Module):
             embedded_energy_curve = self.energy_embed(gold_energy.transpose(1, 2)).transpose(1, 2)
             enriched_encoded_texts = encoded_texts + embedded_energy_curve + embedded_pitch_curve
 
-            upsampled_enriched_encoded_texts = self.length_regulator(enriched_encoded_texts, gold_durations)
+            upsampled_enriched_encoded_texts = self.length_regulator(enriched_encoded_texts, gold_durations, max_length=gold_speech.size(1))
 
         # decoding spectrogram
-        decoder_masks = make_non_pad_mask(speech_lengths, device=speech_lengths.device).unsqueeze(-2) if speech_lengths is not None and not is_inference else None
+        decoder_masks = make_non_pad_mask(speech_lengths, device=speech_lengths.device, maxlen=upsampled_enriched_encoded_texts.size(1)).unsqueeze(-2) if speech_lengths is not None and not is_inference else None
         decoded_speech, _ = self.decoder(upsampled_enriched_encoded_texts, decoder_masks, utterance_embedding=utterance_embedding)
 
         preliminary_spectrogram = self.output_projection(decoded_speech)
@@ -407,7 +413,9 @@ class ToucanTTS(torch.nn.Module):
                    energy_predictions.squeeze()
         else:
             if run_glow:
-                glow_loss = self.post_flow(tgt_mels=gold_speech, infer=is_inference, mel_out=preliminary_spectrogram, encoded_texts=upsampled_enriched_encoded_texts, tgt_nonpadding=decoder_masks)
+                # the log-determinants of the flow are numerically sensitive, so the flow always runs in full precision
+                with torch.autocast(device_type=gold_speech.device.type, enabled=False):
+                    glow_loss = self.post_flow(tgt_mels=gold_speech.float(), infer=is_inference, mel_out=preliminary_spectrogram.float(), encoded_texts=upsampled_enriched_encoded_texts.float(), tgt_nonpadding=decoder_masks)
             else:
                 glow_loss = None
             return preliminary_spectrogram, \
@@ -458,6 +466,16 @@ class ToucanTTS(torch.nn.Module):
             return outs.squeeze().transpose(0, 1), duration_predictions, pitch_predictions, energy_predictions
         return outs.squeeze().transpose(0, 1)
 
+    def set_activation_checkpointing(self, enabled=True):
+        """
+        trades compute for memory during training: the activations of the conformer blocks of
+        the encoder and decoder and of the coupling blocks of the flow are not stored, but
+        recomputed in the backward pass. This allows for much larger batches on the same GPU.
+        """
+        self.encoder.activation_checkpointing = enabled
+        self.decoder.activation_checkpointing = enabled
+        self.post_flow.activation_checkpointing = enabled
+
     def _reset_parameters(self, init_type="xavier_uniform"):
         # initialize parameters
         if init_type != "pytorch":
@@ -43,18 +43,17 @@ class ToucanTTSLoss(torch.nn.Module):
         energy_loss = self.l2_criterion(predicted_energy, gold_energy)
 
         # make weighted masks to ensure that long samples and short samples are all equally important
-        out_masks = make_non_pad_mask(features_lengths).unsqueeze(-1).to(gold_features.device)
+        out_masks = make_non_pad_mask(features_lengths, maxlen=gold_features.size(1)).unsqueeze(-1).to(gold_features.device)
         out_weights = out_masks.float() / out_masks.sum(dim=1, keepdim=True).float()
         out_weights /= gold_features.size(0) * gold_features.size(-1)
-        duration_masks = make_non_pad_mask(text_lengths).to(gold_features.device)
+        duration_masks = make_non_pad_mask(text_lengths, maxlen=gold_durations.size(1)).to(gold_features.device)
         duration_weights = (duration_masks.float() / duration_masks.sum(dim=1, keepdim=True).float())
-        variance_masks = duration_masks.unsqueeze(-1)
         variance_weights = duration_weights.unsqueeze(-1)
 
-        # apply weighted masks
-        distance_loss = distance_loss.mul(out_weights).masked_select(out_masks).sum()
-        duration_loss = (duration_loss.mul(duration_weights).masked_select(duration_masks).sum())
-        pitch_loss = pitch_loss.mul(variance_weights).masked_select(variance_masks).sum()
-        energy_loss = (energy_loss.mul(variance_weights).masked_select(variance_masks).sum())
+        # apply weighted masks. The weights are zero on the padding, so nothing needs to be selected, which would give a shape that depends on the data
+        distance_loss = distance_loss.mul(out_weights).sum()
+        duration_loss = duration_loss.mul(duration_weights).sum()
+        pitch_loss = pitch_loss.mul(variance_weights).sum()
+        energy_loss = energy_loss.mul(variance_weights).sum()
 
         return distance_loss, duration_loss, pitch_loss, energy_loss
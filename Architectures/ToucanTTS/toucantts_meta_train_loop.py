@@ -1,35 +1,55 @@
+from functools import partial
+
 import torch.multiprocessing
 import wandb
 from torch.nn.utils.rnn import pad_sequence
+from torch.utils.data import ConcatDataset
 from torch.utils.data.dataloader import DataLoader
 from tqdm import tqdm
 
 from Architectures.ToucanTTS.LanguageEmbeddingSpaceStructureLoss import LanguageEmbeddingSpaceStructureLoss
+from Architectures.ToucanTTS.toucantts_train_loop import SPEECH_LENGTH_MULTIPLE
+from Architectures.ToucanTTS.toucantts_train_loop import TEXT_LENGTH_MULTIPLE
 from Preprocessing.AudioPreprocessor import AudioPreprocessor
 from Preprocessing.EnCodecAudioPreprocessor import CodecAudioPreprocessor
+from Preprocessing.TextFrontend import compact_phonemes_to_text_vectors
+from Utility.AsyncCheckpointWriter import AsyncCheckpointWriter
+from Utility.BatchPrefetcher import BatchPrefetcher
+from Utility.ExponentialMovingAverage import ExponentialMovingAverage
+from Utility.LengthBucketSampler import get_dataset_lengths
+from Utility.StepProfiler import PhaseTimer
+from Utility.StepProfiler import get_trace_profiler
+from Utility.StepProfiler import print_phase_times
+from Utility.TaskWeightedSampler import TemperatureWeightedBatchSampler
 from Utility.WarmupScheduler import ToucanWarmupScheduler as WarmupScheduler
 from Utility.path_to_transcript_dicts import *
+from Utility.utils import average_losses
 from Utility.utils import delete_old_checkpoints
+from Utility.utils import get_autocast_dtype
 from Utility.utils import get_most_recent_checkpoint
+from Utility.utils import pad_to_multiple
 from Utility.utils import plot_progress_spec_toucantts
+from Utility.utils import speech_batch_to_mels
 from run_weight_averaging import average_checkpoints
 from run_weight_averaging import get_n_recent_checkpoints_paths
 from run_weight_averaging import load_net_toucan
 from run_weight_averaging import save_model_for_use
 
 
-def collate_and_pad(batch):
-    # text, text_len, speech, speech_len, durations, energy, pitch, utterance condition, language_id
-    return (pad_sequence([datapoint[0] for datapoint in batch], batch_first=True).float(),
+def collate_and_pad(batch, length_multiple=None):
+    # text, text_len, speech, speech_len, durations, energy, pitch, utterance condition, language_id, speaker embedding, language_id list
+    # with a length multiple, the text axis is padded a bit further, so that only a limited number of distinct shapes occur
+    return (pad_to_multiple(pad_sequence([compact_phonemes_to_text_vectors(datapoint[0]) for datapoint in batch], batch_first=True).float(), length_multiple),
             torch.stack([datapoint[1] for datapoint in batch]).squeeze(1),
             [datapoint[2] for datapoint in batch],
             torch.stack([datapoint[3] for datapoint in batch]).squeeze(1),
-            pad_sequence([datapoint[4].squeeze() for datapoint in batch], batch_first=True),
-            pad_sequence([datapoint[5].squeeze() for datapoint in batch], batch_first=True),
-            pad_sequence([datapoint[6].squeeze() for datapoint in batch], batch_first=True),
+            pad_to_multiple(pad_sequence([datapoint[4].squeeze() for datapoint in batch], batch_first=True), length_multiple),
+            pad_to_multiple(pad_sequence([datapoint[5].squeeze() for datapoint in batch], batch_first=True), length_multiple),
+            pad_to_multiple(pad_sequence([datapoint[6].squeeze() for datapoint in batch], batch_first=True), length_multiple),
             None,
             torch.stack([datapoint[8] for datapoint in batch]),
-            torch.stack([datapoint[9] for datapoint in batch]))
+            torch.stack([datapoint[9] for datapoint in batch]),
+            [int(datapoint[8]) for datapoint in batch])  # the language IDs also as a list, which stays on the CPU for the language embedding space structure loss
 
 
 def train_loop(net,
@@ -46,9 +66,15 @@ def train_loop(net,
                fine_tune,
                warmup_steps,
                use_wandb,
-               train_samplers,
                gpu_count,
                use_less_loss,
+               use_length_buckets=False,
+               length_bucket_pool_size=32,
+               precision="fp32",
+               language_sampling_temperature=None,
+               ema_decay=0.999,
+               activation_checkpointing=False,
+               compile_model=False,
                ):
     """
     see train loop arbiter for explanations of the arguments
@@ -91,30 +117,40 @@ def train_loop(net,
         model = net.module
     else:
         model = net
+    model.set_activation_checkpointing(activation_checkpointing)
+    if compile_model:
+        # only the training forward uses the compiled version, everything else (e.g. the state dict) is taken from the model itself
+        net = torch.compile(net)
 
     torch.multiprocessing.set_sharing_strategy('file_system')
-    train_loaders = list()
-    train_iters = list()
     ap = CodecAudioPreprocessor(input_sr=-1, device=device)
     spec_extractor = AudioPreprocessor(input_sr=16000, output_sr=16000, device=device)
 
-    for dataset, sampler in zip(datasets, train_samplers):
-        batch_sampler_train = torch.utils.data.BatchSampler(sampler, 1, drop_last=True)
-        train_loaders.append(DataLoader(dataset=dataset,
-                                        batch_sampler=batch_sampler_train,
-                                        num_workers=0,
-                                        pin_memory=True,
-                                        prefetch_factor=None,
-                                        collate_fn=lambda x: x[0]))
-        train_iters.append(iter(train_loaders[-1]))
-
     # embedding training is not supported here
-    optimizer = torch.optim.Adam([p for name, p in model.named_parameters() if 'post_flow' not in name], lr=lr)
-    flow_optimizer = torch.optim.Adam(model.post_flow.parameters(), lr=lr)
+    parameters = [p for name, p in model.named_parameters() if 'post_flow' not in name]  # collected once, so they don't need to be gathered again in every step
+    flow_parameters = list(model.post_flow.parameters())
+    optimizer = torch.optim.Adam(parameters, lr=lr)
+    flow_optimizer = torch.optim.Adam(flow_parameters, lr=lr)
 
     scheduler = WarmupScheduler(optimizer, peak_lr=lr, warmup_steps=warmup_steps, max_steps=steps)
     flow_scheduler = WarmupScheduler(flow_optimizer, peak_lr=lr, warmup_steps=(warmup_steps // 4), max_steps=steps)
 
+    autocast_dtype = get_autocast_dtype(precision, device)
+    grad_scaler = torch.cuda.amp.GradScaler(enabled=autocast_dtype == torch.float16)  # one scaler for both optimizers, since they share a single backward pass
+
+    def update_best_model(checkpoint):
+        # runs in the background after the checkpoint is written
+        delete_old_checkpoints(save_directory, keep=5)
+        if checkpoint["ema"] is not None:
+            # the moving average is already a ready to use model, so no checkpoints have to be loaded again
+            torch.save({"model": checkpoint["ema"]["shadow"], "default_emb": checkpoint["default_emb"], "config": checkpoint["config"]}, os.path.join(save_directory, "best.pt"))
+        else:
+            checkpoint_paths = get_n_recent_checkpoints_paths(checkpoint_dir=save_directory, n=1)
+            averaged_model, default_embed = average_checkpoints(checkpoint_paths, load_func=load_net_toucan)
+            save_model_for_use(model=averaged_model, default_embed=default_embed, name=os.path.join(save_directory, "best.pt"))
+
+    checkpoint_writer = AsyncCheckpointWriter()
+
     steps_run_previously = 0
     regression_losses_total = list()
     glow_losses_total = list()
@@ -133,10 +169,35 @@ def train_loop(net,
             scheduler.load_state_dict(check_dict["scheduler"])
             flow_optimizer.load_state_dict(check_dict["flow_optimizer"])
             flow_scheduler.load_state_dict(check_dict["flow_scheduler"])
+            if "grad_scaler" in check_dict:
+                grad_scaler.load_state_dict(check_dict["grad_scaler"])
             steps_run_previously = check_dict["step_counter"]
         if steps_run_previously > steps:
             print("Desired steps already reached in loaded checkpoint.")
             return
+    ema = ExponentialMovingAverage(model, decay=ema_decay) if ema_decay is not None else None  # created after loading, so fine-tuning starts averaging from the loaded weights
+    if ema is not None and path_to_checkpoint is not None and not fine_tune and check_dict.get("ema") is not None:
+        ema.load_state_dict(check_dict["ema"])
+
+    # all tasks (i.e. languages) share one global index, the sampler decides how often each of them is seen.
+    # Every process draws its own batches, and a resumed run doesn't replay the draws from the beginning.
+    rank = torch.distributed.get_rank() if gpu_count > 1 else 0
+    train_dataset = ConcatDataset(datasets)
+    batch_sampler_train = TemperatureWeightedBatchSampler(dataset_sizes=[len(dataset) for dataset in datasets],
+                                                          batch_size=batch_size,
+                                                          temperature=language_sampling_temperature,
+                                                          lengths=get_dataset_lengths(train_dataset) if use_length_buckets else None,
+                                                          length_bucket_pool_size=length_bucket_pool_size,
+                                                          seed=steps_run_previously * gpu_count + rank)
+    train_loader = DataLoader(dataset=train_dataset,
+                              batch_sampler=batch_sampler_train,
+                              num_workers=0,
+                              pin_memory=False,  # the prefetcher takes care of this
+                              prefetch_factor=None,
+                              collate_fn=partial(collate_and_pad, length_multiple=TEXT_LENGTH_MULTIPLE if compile_model else None))
+
+    # the next batches are assembled and moved to the GPU in the background while the current step computes
+    batch_iter = iter(BatchPrefetcher(train_loader, device))
 
     net.train()
     # =============================
@@ -151,29 +212,21 @@ def train_loop(net,
             language_embeddings = model.encoder.language_embedding(torch.LongTensor(language_ids).to(device))
             less_value_unsupervised = less_loss(language_ids, language_embeddings)
             optimizer.zero_grad()
-            less_values.append(less_value_unsupervised.item())
+            less_values.append(less_value_unsupervised.detach())
             less_value_unsupervised.backward()
             optimizer.step()
             if i % warmup_steps // 2 == 0:
-                print(sum(less_values) / len(less_values))
+                print(average_losses(less_values))
                 less_values = list()
 
+    phase_timer = PhaseTimer(device)
+    profiler = get_trace_profiler(os.path.join(save_directory, "profiler_trace"))
+    profiler.start()
     for step_counter in tqdm(range(steps_run_previously, steps)):
         run_glow = step_counter > (warmup_steps * 2)
 
-        batches = []
-        while len(batches) < batch_size:
-            for index in random.sample(list(range(len(datasets))), len(datasets)):
-                if len(batches) < batch_size:
-                    # we get one batch for each task (i.e. language in this case) in a randomized order
-                    try:
-                        batch = next(train_iters[index])
-                        batches.append(batch)
-                    except StopIteration:
-                        train_iters[index] = iter(train_loaders[index])
-                        batch = next(train_iters[index])
-                        batches.append(batch)
-        batch = collate_and_pad(batches)
+        batch = next(batch_iter)
+        phase_timer.mark("data fetch")
 
         text_tensors = batch[0].to(device)
         text_lengths = batch[1].squeeze().to(device)
@@ -184,14 +237,9 @@ def train_loop(net,
         gold_energy = batch[5].unsqueeze(-1).to(device)  # mind the switched order
         lang_ids = batch[8].squeeze(1).to(device)
 
-        speech_batch = list()  # I wish this could be done in the collate function or in the getitem, but using DL models in multiprocessing on very large datasets causes just way too many issues.
-        for speech_sample in speech_indexes:
-            with torch.inference_mode():
-                wave = ap.indexes_to_audio(speech_sample.int().to(device)).detach()
-                mel = spec_extractor.audio_to_mel_spec_tensor(wave, explicit_sampling_rate=16000).transpose(0, 1).detach().cpu()
-            gold_speech_sample = mel.clone()
-            speech_batch.append(gold_speech_sample)
-        gold_speech = pad_sequence(speech_batch, batch_first=True).to(device)
+        speech_batch = speech_batch_to_mels(speech_indexes, ap, spec_extractor)  # I wish this could be done in the collate function or in the getitem, but using DL models in multiprocessing on very large datasets causes just way too many issues.
+        gold_speech = pad_to_multiple(pad_sequence(speech_batch, batch_first=True), SPEECH_LENGTH_MULTIPLE if compile_model else None).to(device)
+        phase_timer.mark("codec decoding and mel extraction")
 
         train_loss = 0.0
         # we sum the loss for each task, as we would do for the
@@ -199,32 +247,31 @@ def train_loop(net,
         # step (i.e. iterations of inner loop = 1)
 
         utterance_embedding = batch[9].to(device)
-        regression_loss, glow_loss, duration_loss, pitch_loss, energy_loss = net(
-            text_tensors=text_tensors,
-            text_lengths=text_lengths,
-            gold_speech=gold_speech,
-            speech_lengths=speech_lengths,
-            gold_durations=gold_durations,
-            gold_pitch=gold_pitch,
-            gold_energy=gold_energy,
-            utterance_embedding=utterance_embedding,
-            lang_ids=lang_ids,
-            return_feats=False,
-            run_glow=run_glow
-        )
+        with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+            regression_loss, glow_loss, duration_loss, pitch_loss, energy_loss = net(
+                text_tensors=text_tensors,
+                text_lengths=text_lengths,
+                gold_speech=gold_speech,
+                speech_lengths=speech_lengths,
+                gold_durations=gold_durations,
+                gold_pitch=gold_pitch,
+                gold_energy=gold_energy,
+                utterance_embedding=utterance_embedding,
+                lang_ids=lang_ids,
+                return_feats=False,
+                run_glow=run_glow
+            )
 
         if use_less_loss:
             language_embeddings_seen = model.encoder.language_embedding(lang_ids)
             language_ids = random.sample(valid_language_ids, batch_size)
             language_embeddings_random = model.encoder.language_embedding(torch.LongTensor(language_ids).to(device))
-            less_value = less_loss(lang_ids.cpu().squeeze().tolist() + language_ids, torch.cat([language_embeddings_seen, language_embeddings_random], dim=0))
+            less_value = less_loss(batch[10] + language_ids, torch.cat([language_embeddings_seen, language_embeddings_random], dim=0))
 
         # then we directly update our meta-parameters without
         # the need for any task specific parameters
 
-        if torch.isnan(regression_loss) or torch.isnan(duration_loss) or torch.isnan(pitch_loss) or torch.isnan(energy_loss):
-            print("One of the losses turned to NaN! Skipping this batch ...")
-            continue
+        phase_timer.mark("forward")
 
         train_loss = train_loss + regression_loss
         train_loss = train_loss + duration_loss
@@ -234,76 +281,89 @@ def train_loop(net,
             train_loss = train_loss + less_value * 2
 
         if glow_loss is not None:  # even if run_glow is true, this can still happen if the log prob cannot be calculated.
-
-            if torch.isnan(glow_loss) or torch.isinf(glow_loss):
-                print("Glow loss turned to NaN! Skipping this batch ...")
-                continue
-
             train_loss = train_loss + glow_loss
 
-            if glow_loss < 0.0:
-                glow_losses_total.append(glow_loss.item())
-            else:
-                glow_losses_total.append(0.1)  # just to avoid super large numbers during plotting that mess up the scaling
-        else:
-            glow_losses_total.append(0)
-
-        regression_losses_total.append(regression_loss.item())
-        duration_losses_total.append(duration_loss.item())
-        pitch_losses_total.append(pitch_loss.item())
-        energy_losses_total.append(energy_loss.item())
-        if use_less_loss:
-            less_losses_total.append(less_value.item())
-
         optimizer.zero_grad()
         flow_optimizer.zero_grad()
         if type(train_loss) is float:
             print("There is no loss for this step! Skipping ...")
             continue
-        train_loss.backward()
-        torch.nn.utils.clip_grad_norm_([p for name, p in model.named_parameters() if 'post_flow' not in name], 1.0, error_if_nonfinite=False)
-        optimizer.step()
+        grad_scaler.scale(train_loss).backward()
+        phase_timer.mark("backward")
+        grad_scaler.unscale_(optimizer)
+        gradient_norm = torch.nn.utils.clip_grad_norm_(parameters, 1.0, error_if_nonfinite=False)
+        if glow_loss is not None:
+            grad_scaler.unscale_(flow_optimizer)
+            gradient_norm = gradient_norm + torch.nn.utils.clip_grad_norm_(flow_parameters, 1.0, error_if_nonfinite=False)
+
+        # a NaN in any of the losses ends up in the gradients, so checking them once is the only point per step where the device has to be synchronized.
+        # By now, the backward has already been queued and the gradients are synchronized, so with multiple processes, they all agree on skipping.
+        # With fp16, an overflow shows up the same way, then the step is skipped and the grad scaler only lowers its scale.
+        if not torch.isfinite(gradient_norm):
+            if grad_scaler.is_enabled():
+                grad_scaler.update()  # the non-finite gradients were already recorded when unscaling, so this lowers the scale
+            else:
+                print("One of the losses turned to NaN! Skipping this batch ...")
+            continue
+
+        regression_losses_total.append(regression_loss.detach())
+        duration_losses_total.append(duration_loss.detach())
+        pitch_losses_total.append(pitch_loss.detach())
+        energy_losses_total.append(energy_loss.detach())
+        if use_less_loss:
+            less_losses_total.append(less_value.detach())
+        if glow_loss is not None:
+            glow_losses_total.append(torch.where(glow_loss.detach() < 0.0, glow_loss.detach(), 0.1))  # just to avoid super large numbers during plotting that mess up the scaling
+        else:
+            glow_losses_total.append(torch.zeros([], device=device))
+
+        grad_scaler.step(optimizer)
         scheduler.step()
         if glow_loss is not None:
-            torch.nn.utils.clip_grad_norm_(model.post_flow.parameters(), 1.0, error_if_nonfinite=False)
-            flow_optimizer.step()
+            grad_scaler.step(flow_optimizer)
             flow_scheduler.step()
+        grad_scaler.update()
+        if ema is not None:
+            ema.update(model)
+        phase_timer.mark("optimizer step")
+        profiler.step()
 
         if step_counter % steps_per_checkpoint == 0 and step_counter != 0:
             # ==============================
             # Enough steps for some insights
             # ==============================
-            if gpu_count > 1:
-                rank = int(os.environ["LOCAL_RANK"])
-            else:
-                rank = 0
             if rank == 0:
                 net.eval()
                 default_embedding = datasets[0][0][9].to(device)
-                print("Reconstruction Loss:    {}".format(round(sum(regression_losses_total) / len(regression_losses_total), 3)))
+                print("Reconstruction Loss:    {}".format(round(average_losses(regression_losses_total), 3)))
                 print("Steps:                  {}\n".format(step_counter))
-                torch.save({
+                phase_times = phase_timer.summary()
+                print_phase_times(phase_times)
+                checkpoint_writer.save({
                     "model"         : model.state_dict(),
                     "optimizer"     : optimizer.state_dict(),
                     "scheduler"     : scheduler.state_dict(),
                     "flow_optimizer": flow_optimizer.state_dict(),
                     "flow_scheduler": flow_scheduler.state_dict(),
+                    "grad_scaler"   : grad_scaler.state_dict(),
+                    "ema"           : ema.state_dict() if ema is not None else None,
                     "step_counter"  : step_counter,
                     "default_emb"   : default_embedding,
                     "config"        : model.config
                 },
-                    os.path.join(save_directory, "checkpoint_{}.pt".format(step_counter)))
-                delete_old_checkpoints(save_directory, keep=5)
+                    os.path.join(save_directory, "checkpoint_{}.pt".format(step_counter)),
+                    after_save=update_best_model)
 
                 if use_wandb:
                     wandb.log({
-                        "regression_loss"         : round(sum(regression_losses_total) / len(regression_losses_total), 5),
-                        "glow_loss"               : round(sum(glow_losses_total) / len(glow_losses_total), 5),
-                        "duration_loss"           : round(sum(duration_losses_total) / len(duration_losses_total), 5),
-                        "pitch_loss"              : round(sum(pitch_losses_total) / len(pitch_losses_total), 5),
-                        "energy_loss"             : round(sum(energy_losses_total) / len(energy_losses_total), 5),
-                        "embedding_structure_loss": 0.0 if len(less_losses_total) == 0 else round(sum(less_losses_total) / len(less_losses_total), 5),
-                        "learning_rate"           : optimizer.param_groups[0]['lr']
+                        "regression_loss"         : round(average_losses(regression_losses_total), 5),
+                        "glow_loss"               : round(average_losses(glow_losses_total), 5),
+                        "duration_loss"           : round(average_losses(duration_losses_total), 5),
+                        "pitch_loss"              : round(average_losses(pitch_losses_total), 5),
+                        "energy_loss"             : round(average_losses(energy_losses_total), 5),
+                        "embedding_structure_loss": 0.0 if len(less_losses_total) == 0 else round(average_losses(less_losses_total), 5),
+                        "learning_rate"           : optimizer.param_groups[0]['lr'],
+                        **{f"time/{phase}": round(seconds, 2) for phase, seconds in phase_times.items()}
                     }, step=step_counter)
 
                 try:
@@ -322,10 +382,6 @@ def train_loop(net,
                 except IndexError:
                     print("generating progress plots failed.")
 
-                checkpoint_paths = get_n_recent_checkpoints_paths(checkpoint_dir=save_directory, n=1)
-                averaged_model, default_embed = average_checkpoints(checkpoint_paths, load_func=load_net_toucan)
-                save_model_for_use(model=averaged_model, default_embed=default_embed, name=os.path.join(save_directory, "best.pt"))
-
                 net.train()
 
             regression_losses_total = list()
@@ -334,3 +390,7 @@ def train_loop(net,
             pitch_losses_total = list()
             energy_losses_total = list()
             less_losses_total = list()
+        phase_timer.mark("checkpointing")
+
+    checkpoint_writer.wait()
+    profiler.stop()
@@ -10,10 +10,10 @@ def train_loop(net,  # an already initialized ToucanTTS model that should be tra
                # in that language. So every list entry here should be a (combined) dataset for each language. For the case of a monolingual model, pass a list
                # with only one dataset in it. This will trigger the arbiter to call the train loop for simple one language training runs rather than the complex
                # LAML based one.
-               train_samplers,  # the sampler(s) for the dataloader(s) (gpu_count or single GPU use different ones)
                gpu_count,  # amount of GPUs to use
                device,  # the device where this training should run on.
                save_directory,  # directory where the models and visualizations should be saved.
+               train_samplers=None,  # only relevant for the monolingual case: a list with the sampler for the dataloader, a random sampler is used if none is given. The multilingual case samples from all datasets jointly.
                steps_per_checkpoint=None,  # how many steps should be trained before a checkpoint is created. This is only relevant for the multilingual case,
                # the monolingual case will do this once per epoch, regardless of the steps.
                path_to_checkpoint=None,  # path to a trained checkpoint to either continue training or fine-tune from.
@@ -26,6 +26,13 @@ def train_loop(net,  # an already initialized ToucanTTS model that should be tra
                fine_tune=False,  # whether to use the provided checkpoint as basis for fine-tuning.
                steps=200000,  # how many updates to run until training is completed
                use_less_loss=False,  # whether to use the loss that enforces a structure in the language embedding space
+               use_length_buckets=False,  # whether to put samples of similar length into the same batch, which saves a lot of compute that would otherwise be spent on padding.
+               precision="fp32",  # fp32, bf16 or fp16. The mixed precision options save memory and are faster on GPUs with tensor cores. The normalizing flow always runs in fp32.
+               language_sampling_temperature=None,  # only relevant for the multilingual case. Languages are drawn with probability proportional to (size of language / size of all) ** (1 / temperature).
+               # 1 samples proportional to the amount of data, higher values flatten the distribution and None samples all languages equally often.
+               ema_decay=0.999,  # decay of the moving average of the weights that is saved as best.pt. None saves the weights of the most recent checkpoint instead.
+               activation_checkpointing=False,  # whether to recompute the activations of the conformer and flow blocks in the backward pass instead of storing them. Saves a lot of memory, so larger batches fit, but each step takes longer.
+               compile_model=False,  # whether to train with a model compiled by torch.compile. The first steps take a while, afterwards every step is faster. Works best together with length buckets.
                ):
     torch.multiprocessing.set_start_method('spawn', force=True)
     if type(datasets) != list:
@@ -33,7 +40,6 @@ def train_loop(net,  # an already initialized ToucanTTS model that should be tra
     if len(datasets) > 1:
         multi_language_loop(net=net,
                             datasets=datasets,
-                            train_samplers=train_samplers,
                             device=device,
                             save_directory=save_directory,
                             batch_size=batch_size,
@@ -48,11 +54,17 @@ def train_loop(net,  # an already initialized ToucanTTS model that should be tra
                             use_wandb=use_wandb,
                             gpu_count=gpu_count,
                             use_less_loss=use_less_loss,
+                            use_length_buckets=use_length_buckets,
+                            precision=precision,
+                            language_sampling_temperature=language_sampling_temperature,
+                            ema_decay=ema_decay,
+                            activation_checkpointing=activation_checkpointing,
+                            compile_model=compile_model,
                             )
     else:
         mono_language_loop(net=net,
                            train_dataset=datasets[0],
-                           train_sampler=train_samplers[0],
+                           train_sampler=train_samplers[0] if train_samplers is not None else torch.utils.data.RandomSampler(datasets[0]),
                            device=device,
                            save_directory=save_directory,
                            batch_size=batch_size,
@@ -65,5 +77,10 @@ def train_loop(net,  # an already initialized ToucanTTS model that should be tra
                            steps=steps,
                            use_wandb=use_wandb,
                            gpu_count=gpu_count,
-                           steps_per_checkpoint=steps_per_checkpoint
+                           steps_per_checkpoint=steps_per_checkpoint,
+                           use_length_buckets=use_length_buckets,
+                           precision=precision,
+                           ema_decay=ema_decay,
+                           activation_checkpointing=activation_checkpointing,
+                           compile_model=compile_model
                            )
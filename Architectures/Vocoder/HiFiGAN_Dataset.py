@@ -1,7 +1,8 @@
 import os
 import random
-from multiprocessing import Manager
-from multiprocessing import Process
+from collections import defaultdict
+from functools import partial
+from multiprocessing import Pool
 
 import librosa
 import numpy
@@ -13,105 +14,73 @@ from torchvision.transforms.v2 import GaussianBlur
 from tqdm import tqdm
 
 from Preprocessing.AudioPreprocessor import AudioPreprocessor
+from Preprocessing.AudioPreprocessor import LogMelSpec
+from Utility.FeatureStore import FeatureStore
+from Utility.FeatureStore import FeatureStoreWriter
 
 
-def random_pitch_shifter(x):
-    n_steps = random.choice([-12, -9, -6, 3, 12])  # when using 12 steps per octave, these are the only ones that are pretty fast. I benchmarked it and the variance is many orders of magnitude.
-    return torchaudio.transforms.PitchShift(sample_rate=24000, n_steps=n_steps)(x)
+PITCH_SHIFT_STEPS = [-12, -9, -6, 3, 12]  # when using 12 steps per octave, these are the only ones that are pretty fast. I benchmarked it and the variance is many orders of magnitude.
 
 
-def polarity_inverter(x):
-    return x * -1
+def random_pitch_shifter(x):
+    n_steps = random.choice(PITCH_SHIFT_STEPS)
+    return torchaudio.transforms.PitchShift(sample_rate=24000, n_steps=n_steps)(x)
 
 
 class HiFiGANDataset(Dataset):
 
     def __init__(self,
                  list_of_paths,
+                 cache_dir,
                  desired_samplingrate=24000,
                  samples_per_segment=12288,  # = (8192 * 3) 2 , as I used 8192 for 16kHz previously
                  loading_processes=max(os.cpu_count() - 2, 1),
-                 use_random_corruption=False):
+                 use_random_corruption=False,
+                 gpu_count=1):
         self.use_random_corruption = use_random_corruption
         self.samples_per_segment = samples_per_segment
         self.desired_samplingrate = desired_samplingrate
-        self.melspec_ap = AudioPreprocessor(input_sr=self.desired_samplingrate,
-                                            output_sr=16000,
-                                            cut_silence=False)
         # hop length of spec loss should be same as the product of the upscale factors
         # samples per segment must be a multiple of hop length of spec loss
-        if loading_processes == 1:
-            self.waves = list()
-            self.cache_builder_process(list_of_paths)
+        wave_store_path = os.path.join(cache_dir, "vocoder_waves")
+        if not FeatureStore.exists(wave_store_path):
+            if gpu_count != 1:
+                import sys
+                print("Please pack the waves using only a single GPU. Multi-GPU is only supported for training.")
+                sys.exit()
+            os.makedirs(cache_dir, exist_ok=True)
+            build_wave_store(list_of_paths, wave_store_path, self.desired_samplingrate, loading_processes)
         else:
-            resource_manager = Manager()
-            self.waves = resource_manager.list()
-            # make processes
-            path_splits = list()
-            process_list = list()
-            for i in range(loading_processes):
-                path_splits.append(list_of_paths[i * len(list_of_paths) // loading_processes:(i + 1) * len(
-                    list_of_paths) // loading_processes])
-            for path_split in path_splits:
-                process_list.append(Process(target=self.cache_builder_process, args=(path_split,), daemon=True))
-                process_list[-1].start()
-            for process in process_list:
-                process.join()
-        self.blurrer = GaussianBlur(kernel_size=(5, 5), sigma=(0.5, 2.0))  # simulating the smoothness of a generated spectrogram
-        # self.masker = torchaudio.transforms.FrequencyMasking(freq_mask_param=16, iid_masks=True)  # up to 16 consecutive bands can be masked, each element in the batch gets a different mask. Taken out because it seems too extreme.
-        self.spec_augs = [self.blurrer, lambda x: x, lambda x: x, lambda x: x, lambda x: x]
-        self.wave_augs = [random_pitch_shifter, polarity_inverter, lambda x: x, lambda x: x, lambda x: x, lambda x: x]  # just some data augmentation
-        self.wave_distortions = [CodecSimulator(), lambda x: x, lambda x: x, lambda x: x, lambda x: x]  # simulating the fact, that we train the TTS on codec-compressed waves
+            print(f"Using the waves that are already packed in {cache_dir}, the list of paths is ignored.")
+        # the waves stay on disk and only the segments that are actually used are read, so this takes no time and no memory, no matter the size of the corpus
+        self.waves = FeatureStore(wave_store_path)
         print("{} eligible audios found".format(len(self.waves)))
 
-    def cache_builder_process(self, path_split):
-        for path in tqdm(path_split):
-            try:
-                wave, sr = sf.read(path)
-                if len(wave.shape) == 2:
-                    wave = librosa.to_mono(numpy.transpose(wave))
-                if sr != self.desired_samplingrate:
-                    wave = librosa.resample(y=wave, orig_sr=sr, target_sr=self.desired_samplingrate)
-
-                self.waves.append(wave)
-            except RuntimeError:
-                print(f"Problem with the following path: {path}")
-
     def __getitem__(self, index):
         """
-        load the audio from the path and clean it.
+        load a random segment of the audio.
         All audio segments have to be cut to the same length,
         according to the NeurIPS reference implementation.
 
-        return a pair of high-res audio and corresponding low-res spectrogram as if it was predicted by the TTS
+        return the high-res audio, the augmentations and the corresponding
+        low-res spectrogram are computed for the whole batch by the HiFiGANBatchProcessor
         """
         try:
-            wave = self.waves[index]
-            while len(wave) < self.samples_per_segment + 50:  # + 50 is just to be extra sure
-                # catch files that are too short to apply meaningful signal processing and make them longer
-                wave = numpy.concatenate([wave, numpy.zeros(shape=1000), wave])
-                # add some true silence in the mix, so the vocoder is exposed to that as well during training
-            wave = torch.Tensor(wave)
-
-            if self.use_random_corruption:
-                # augmentations for the wave
-                wave = random.choice(self.wave_augs)(wave.unsqueeze(0)).squeeze(0)  # it is intentional that this affects the target as well. This is not a distortion, but an augmentation.
-
-            max_audio_start = len(wave) - self.samples_per_segment
-            audio_start = random.randint(0, max_audio_start)
-            segment = wave[audio_start: audio_start + self.samples_per_segment]
-
-            resampled_segment = self.melspec_ap.resample(segment).float()  # 16kHz spectrogram as input, 24kHz wave as output, see Blizzard 2021 DelightfulTTS
-            if self.use_random_corruption:
-                # augmentations for the wave
-                resampled_segment = random.choice(self.wave_distortions)(resampled_segment.unsqueeze(0)).squeeze(0)
-            melspec = self.melspec_ap.audio_to_mel_spec_tensor(resampled_segment,
-                                                               explicit_sampling_rate=16000,
-                                                               normalize=False).transpose(0, 1)[:-1].transpose(0, 1)
-            if self.use_random_corruption:
-                # augmentations for the spec
-                melspec = random.choice(self.spec_augs)(melspec.unsqueeze(0)).squeeze(0)
-            return segment.detach(), melspec.detach()
+            wave_length = self.waves.get_length(index)
+            if wave_length < self.samples_per_segment + 50:  # + 50 is just to be extra sure
+                wave = self.waves[index].view(-1)
+                while len(wave) < self.samples_per_segment + 50:
+                    # catch files that are too short to apply meaningful signal processing and make them longer
+                    wave = torch.cat([wave, torch.zeros(1000), wave])
+                    # add some true silence in the mix, so the vocoder is exposed to that as well during training
+                max_audio_start = len(wave) - self.samples_per_segment
+                audio_start = random.randint(0, max_audio_start)
+                segment = wave[audio_start: audio_start + self.samples_per_segment]
+            else:
+                max_audio_start = wave_length - self.samples_per_segment
+                audio_start = random.randint(0, max_audio_start)
+                segment = self.waves.get_slice(index, audio_start, self.samples_per_segment).view(-1)
+            return segment.detach()
         except RuntimeError:
             print("encountered a runtime error, using fallback strategy")
             if index == 0:
@@ -122,6 +91,112 @@ class HiFiGANDataset(Dataset):
         return len(self.waves)
 
 
+def build_wave_store(list_of_paths, wave_store_path, desired_samplingrate, loading_processes):
+    """
+    resamples all audios once and packs them into a single file, from which the dataset can read segments directly.
+    The workers hand back one wave at a time, so only a handful of waves are in memory at any point.
+    """
+    wave_store = FeatureStoreWriter(wave_store_path, feature_dim=1, dtype="float32")  # half precision would quantize the gold waves more coarsely than the 16 bit PCM they come from
+    loader = partial(load_wave, desired_samplingrate=desired_samplingrate)
+    if loading_processes == 1:
+        for wave in tqdm(map(loader, list_of_paths), total=len(list_of_paths)):
+            if wave is not None:
+                wave_store.append(wave)
+    else:
+        with Pool(processes=loading_processes) as pool:
+            for wave in tqdm(pool.imap(loader, list_of_paths, chunksize=32), total=len(list_of_paths)):
+                if wave is not None:
+                    wave_store.append(wave)
+    wave_store.close()
+
+
+def load_wave(path, desired_samplingrate):
+    try:
+        wave, sr = sf.read(path)
+        if len(wave.shape) == 2:
+            wave = librosa.to_mono(numpy.transpose(wave))
+        if sr != desired_samplingrate:
+            wave = librosa.resample(y=wave, orig_sr=sr, target_sr=desired_samplingrate)
+        return wave
+    except RuntimeError:
+        print(f"Problem with the following path: {path}")
+        return None
+
+
+class HiFiGANBatchProcessor(torch.nn.Module):
+    """
+    Turns a batch of wave segments into the pairs of high-res audio and
+    low-res spectrogram as if it was predicted by the TTS that the vocoder
+    is trained on. This runs on the training device after the collation, so
+    the augmentations are applied to all samples of the batch that drew the
+    same one at once, rather than to every sample on its own in the workers.
+    """
+
+    def __init__(self, desired_samplingrate=24000, use_random_corruption=False):
+        super().__init__()
+        self.desired_samplingrate = desired_samplingrate
+        self.use_random_corruption = use_random_corruption
+        self.resample = torchaudio.transforms.Resample(orig_freq=desired_samplingrate, new_freq=16000)  # 16kHz spectrogram as input, 24kHz wave as output, see Blizzard 2021 DelightfulTTS
+        self.wave_to_spectrogram = LogMelSpec(16000)
+        self.codec_simulator = CodecSimulator()  # simulating the fact, that we train the TTS on codec-compressed waves
+        self.blurrer = GaussianBlur(kernel_size=(5, 5), sigma=(0.5, 2.0))  # simulating the smoothness of a generated spectrogram
+        # self.masker = torchaudio.transforms.FrequencyMasking(freq_mask_param=16, iid_masks=True)  # up to 16 consecutive bands can be masked, each element in the batch gets a different mask. Taken out because it seems too extreme.
+        self.pitch_shifters = torch.nn.ModuleDict()  # building a pitch shifter is expensive, so there is one per amount of steps that is reused
+        # the same probabilities as picking from lists with one augmentation and a couple of identities
+        self.wave_augs = ["pitch_shift", "polarity_inversion", None, None, None, None]  # just some data augmentation
+        self.wave_distortions = ["codec", None, None, None, None]
+        self.spec_augs = ["blur", None, None, None, None]
+
+    def _shift_pitch(self, waves, n_steps):
+        if str(n_steps) not in self.pitch_shifters:
+            self.pitch_shifters[str(n_steps)] = torchaudio.transforms.PitchShift(sample_rate=self.desired_samplingrate, n_steps=n_steps).to(waves.device)
+        return self.pitch_shifters[str(n_steps)](waves)
+
+    def _draw(self, augmentations, batch_size):
+        """
+        returns for every augmentation the indexes of the samples in the batch that drew it
+        """
+        drawn = defaultdict(list)
+        for index in range(batch_size):
+            augmentation = random.choice(augmentations)
+            if augmentation is not None:
+                drawn[augmentation].append(index)
+        return drawn
+
+    @torch.no_grad()
+    def forward(self, waves):
+        """
+        waves: [batch, samples]
+
+        returns the waves (augmented, since it is intentional that this affects
+        the target as well) and the spectrograms [batch, 128, frames]
+        """
+        if self.use_random_corruption:
+            waves = waves.clone()
+            wave_augs = self._draw(self.wave_augs, len(waves))
+            if "pitch_shift" in wave_augs:
+                indexes_per_step = defaultdict(list)
+                for index in wave_augs["pitch_shift"]:
+                    indexes_per_step[random.choice(PITCH_SHIFT_STEPS)].append(index)
+                for n_steps, indexes in indexes_per_step.items():
+                    waves[indexes] = self._shift_pitch(waves[indexes], n_steps)
+            if "polarity_inversion" in wave_augs:
+                waves[wave_augs["polarity_inversion"]] = waves[wave_augs["polarity_inversion"]] * -1
+
+        resampled_waves = self.resample(waves)
+        if self.use_random_corruption:
+            wave_distortions = self._draw(self.wave_distortions, len(waves))
+            if "codec" in wave_distortions:
+                resampled_waves[wave_distortions["codec"]] = self.codec_simulator(resampled_waves[wave_distortions["codec"]])
+
+        melspecs = self.wave_to_spectrogram(resampled_waves)[:, :, :-1]
+        if self.use_random_corruption:
+            spec_augs = self._draw(self.spec_augs, len(waves))
+            if "blur" in spec_augs:
+                melspecs[spec_augs["blur"]] = self.blurrer(melspecs[spec_augs["blur"]].unsqueeze(1)).squeeze(1)
+        return waves, melspecs
+
+
 class CodecSimulator(torch.nn.Module):
 
     def __init__(self):
@@ -11,7 +11,14 @@ from tqdm import tqdm
 from Architectures.Vocoder.AdversarialLoss import discriminator_adv_loss
 from Architectures.Vocoder.AdversarialLoss import generator_adv_loss
 from Architectures.Vocoder.FeatureMatchingLoss import feature_loss
+from Architectures.Vocoder.HiFiGAN_Dataset import HiFiGANBatchProcessor
 from Architectures.Vocoder.MelSpecLoss import MelSpectrogramLoss
+from Utility.AsyncCheckpointWriter import AsyncCheckpointWriter
+from Utility.ExponentialMovingAverage import ExponentialMovingAverage
+from Utility.StepProfiler import PhaseTimer
+from Utility.StepProfiler import get_trace_profiler
+from Utility.StepProfiler import print_phase_times
+from Utility.utils import average_losses
 from Utility.utils import delete_old_checkpoints
 from Utility.utils import get_most_recent_checkpoint
 from run_weight_averaging import average_checkpoints
@@ -32,26 +39,52 @@ def train_loop(generator,
                generator_steps_per_discriminator_step=5,
                generator_warmup=30000,
                use_wandb=False,
-               finetune=False
+               finetune=False,
+               ema_decay=0.999,
+               gpu_count=1,
+               rank=0
                ):
     step_counter = 0
     epoch = 0
 
     mel_l1 = MelSpectrogramLoss().to(device)
+    batch_processor = HiFiGANBatchProcessor(desired_samplingrate=train_dataset.desired_samplingrate,
+                                            use_random_corruption=train_dataset.use_random_corruption).to(device)
 
     g = generator.to(device)
     d = discriminator.to(device)
 
     g.train()
     d.train()
-    optimizer_g = torch.optim.RAdam(g.parameters(), betas=(0.5, 0.9), lr=0.001, weight_decay=0.0)
+    if gpu_count > 1:
+        # the wrappers are only used for the passes whose gradients have to be synchronized, everything else uses the modules directly
+        g_net = torch.nn.parallel.DistributedDataParallel(g,
+                                                          device_ids=[rank],
+                                                          output_device=rank,
+                                                          find_unused_parameters=True)  # the intermediate waves are not used in the loss during the warmup
+        d_net = torch.nn.parallel.DistributedDataParallel(d,
+                                                          device_ids=[rank],
+                                                          output_device=rank,
+                                                          find_unused_parameters=False)
+        torch.distributed.barrier()
+    else:
+        g_net = g
+        d_net = d
+    generator_parameters = list(g.parameters())  # collected once, so they don't need to be gathered again in every step
+    discriminator_parameters = list(d.parameters())
+    optimizer_g = torch.optim.RAdam(generator_parameters, betas=(0.5, 0.9), lr=0.001, weight_decay=0.0)
     scheduler_g = MultiStepLR(optimizer_g, gamma=0.5, milestones=[500000, 1000000, 1200000, 1400000])
-    optimizer_d = torch.optim.RAdam(d.parameters(), betas=(0.5, 0.9), lr=0.0005, weight_decay=0.0)
+    optimizer_d = torch.optim.RAdam(discriminator_parameters, betas=(0.5, 0.9), lr=0.0005, weight_decay=0.0)
     scheduler_d = MultiStepLR(optimizer_d, gamma=0.5, milestones=[500000, 1000000, 1200000, 1400000])
 
+    if gpu_count > 1:
+        train_sampler = torch.utils.data.distributed.DistributedSampler(train_dataset, drop_last=True)  # every process gets its own share of the data
+    else:
+        train_sampler = None
     train_loader = DataLoader(dataset=train_dataset,
                               batch_size=batch_size,
-                              shuffle=True,
+                              shuffle=train_sampler is None,
+                              sampler=train_sampler,
                               num_workers=8,
                               pin_memory=True,
                               drop_last=True,
@@ -71,12 +104,32 @@ def train_loop(generator,
             step_counter = check_dict["step_counter"]
         d.load_state_dict(check_dict["discriminator"])
         g.load_state_dict(check_dict["generator"])
+    ema = ExponentialMovingAverage(g, decay=ema_decay) if ema_decay is not None else None  # created after loading, so fine-tuning starts averaging from the loaded weights
+    if ema is not None and path_to_checkpoint is not None and not finetune and check_dict.get("generator_ema") is not None:
+        ema.load_state_dict(check_dict["generator_ema"])
 
+    def update_best_model(checkpoint):
+        # runs in the background after the checkpoint is written
+        delete_old_checkpoints(model_save_dir, keep=5)
+        if checkpoint["generator_ema"] is not None:
+            # the moving average is already a ready to use generator, so no checkpoints have to be loaded again
+            torch.save(checkpoint["generator_ema"]["shadow"], os.path.join(model_save_dir, "best.pt"))
+        else:
+            checkpoint_paths = get_n_recent_checkpoints_paths(checkpoint_dir=model_save_dir, n=2)
+            averaged_model, _ = average_checkpoints(checkpoint_paths, load_func=load_net_bigvgan)
+            torch.save(averaged_model.state_dict(), os.path.join(model_save_dir, "best.pt"))
+
+    checkpoint_writer = AsyncCheckpointWriter()
     start_time = time.time()
+    phase_timer = PhaseTimer(device)
+    profiler = get_trace_profiler(os.path.join(model_save_dir, "profiler_trace"))
+    profiler.start()
 
     for _ in range(epochs):
 
         epoch += 1
+        if train_sampler is not None:
+            train_sampler.set_epoch(epoch)
         discriminator_losses = list()
         generator_losses = list()
         mel_losses = list()
@@ -85,107 +138,136 @@ def train_loop(generator,
 
         optimizer_g.zero_grad()
         optimizer_d.zero_grad()
-        for datapoint in tqdm(train_loader):
+        for datapoint in tqdm(train_loader, disable=rank != 0):
+            phase_timer.mark("data fetch")
 
             ############################
             #         Generator        #
             ############################
 
-            gold_wave = datapoint[0].to(device).unsqueeze(1)
-            melspec = datapoint[1].to(device)
-            pred_wave, intermediate_wave_upsampled_twice, intermediate_wave_upsampled_once = g(melspec)
-            if torch.any(torch.isnan(pred_wave)):
-                print("A NaN in the wave! Skipping...")
-                continue
+            gold_wave, melspec = batch_processor(datapoint.to(device))
+            gold_wave = gold_wave.unsqueeze(1)
+            phase_timer.mark("augmentation and mel extraction")
+            pred_wave, intermediate_wave_upsampled_twice, intermediate_wave_upsampled_once = g_net(melspec)
 
             mel_loss = mel_l1(pred_wave.squeeze(1), gold_wave)
             generator_total_loss = mel_loss * 85.0
 
-            if step_counter > generator_warmup + 100:  # a bit of warmup helps, but it's not that important
+            # the step counter is only increased further down, after the generator step
+            train_discriminator = step_counter + 1 > generator_warmup and (step_counter + 1) % generator_steps_per_discriminator_step == 0
+            train_generator_adversarially = step_counter > generator_warmup + 100  # a bit of warmup helps, but it's not that important
+
+            # The discriminator only sees the gold wave once per step. The feature maps don't depend on the train flag,
+            # so the same pass gives the targets for the feature matching and the outputs for the discriminator loss.
+            if train_discriminator:
+                d_gold_outs, d_gold_fmaps = d_net(gold_wave,
+                                                  discriminator_train_flag=True)
+            elif train_generator_adversarially:
+                with torch.no_grad():
+                    d_gold_outs, d_gold_fmaps = d(gold_wave,
+                                                  discriminator_train_flag=True)
+
+            if train_generator_adversarially:
+                d.requires_grad_(False)  # the discriminator is not trained by this loss, so its weights don't need gradients
                 d_outs, d_fmaps = d(wave=pred_wave,
                                     intermediate_wave_upsampled_twice=intermediate_wave_upsampled_twice,
                                     intermediate_wave_upsampled_once=intermediate_wave_upsampled_once)
                 adversarial_loss = generator_adv_loss(d_outs)
-                adversarial_losses.append(adversarial_loss.item())
+                adversarial_losses.append(adversarial_loss.detach())
                 generator_total_loss = generator_total_loss + adversarial_loss * 2  # based on own experience
 
-                d_gold_outs, d_gold_fmaps = d(gold_wave)
-                feature_matching_loss = feature_loss(d_gold_fmaps, d_fmaps)
-                feat_match_losses.append(feature_matching_loss.item())
+                feature_matching_loss = feature_loss([fmap.detach() for fmap in d_gold_fmaps], d_fmaps)
+                feat_match_losses.append(feature_matching_loss.detach())
                 generator_total_loss = generator_total_loss + feature_matching_loss
+            phase_timer.mark("generator forward")
+
+            optimizer_g.zero_grad()
+            generator_total_loss.backward()
+            d.requires_grad_(True)
+            phase_timer.mark("generator backward")
+            generator_gradient_norm = torch.nn.utils.clip_grad_norm_(generator_parameters, 10.0)
 
-            if torch.isnan(generator_total_loss):
+            # a NaN in the loss ends up in the gradients, so this is the only point where the device has to be synchronized.
+            # The gradients are already synchronized at this point, so with multiple processes, they all agree on skipping.
+            if not torch.isfinite(generator_gradient_norm):
                 print("Loss turned to NaN, skipping. The GAN possibly collapsed.")
+                optimizer_g.zero_grad()
                 continue
 
             step_counter += 1
+            generator_losses.append(generator_total_loss.detach())
+            mel_losses.append(mel_loss.detach())
 
-            optimizer_g.zero_grad()
-            generator_total_loss.backward()
-            generator_losses.append(generator_total_loss.item())
-            mel_losses.append(mel_loss.item())
-
-            torch.nn.utils.clip_grad_norm_(g.parameters(), 10.0)
             optimizer_g.step()
             scheduler_g.step()
             optimizer_g.zero_grad()
+            if ema is not None:
+                ema.update(g)
+            phase_timer.mark("generator optimizer step")
 
             ############################
             #       Discriminator      #
             ############################
 
-            if step_counter > generator_warmup and step_counter % generator_steps_per_discriminator_step == 0:
-                d_outs, d_fmaps = d(wave=pred_wave.detach(),
-                                    intermediate_wave_upsampled_twice=intermediate_wave_upsampled_twice.detach(),
-                                    intermediate_wave_upsampled_once=intermediate_wave_upsampled_once.detach(),
-                                    discriminator_train_flag=True)
-                d_gold_outs, d_gold_fmaps = d(gold_wave,
-                                              discriminator_train_flag=True)  # have to recompute unfortunately due to autograd behaviour
+            if train_discriminator:
+                d_outs, d_fmaps = d_net(wave=pred_wave.detach(),
+                                        intermediate_wave_upsampled_twice=intermediate_wave_upsampled_twice.detach(),
+                                        intermediate_wave_upsampled_once=intermediate_wave_upsampled_once.detach(),
+                                        discriminator_train_flag=True)
                 discriminator_loss = discriminator_adv_loss(d_gold_outs, d_outs)
                 optimizer_d.zero_grad()
                 discriminator_loss.backward()
-                discriminator_losses.append(discriminator_loss.item())
-                torch.nn.utils.clip_grad_norm_(d.parameters(), 10.0)
+                discriminator_losses.append(discriminator_loss.detach())
+                torch.nn.utils.clip_grad_norm_(discriminator_parameters, 10.0)
                 optimizer_d.step()
                 scheduler_d.step()
                 optimizer_d.zero_grad()
+            phase_timer.mark("discriminator step")
+            profiler.step()
 
         ##########################
         #     Epoch Complete     #
         ##########################
 
+        if rank != 0:
+            continue  # only the first process writes checkpoints and logs
+
         if epoch % epochs_per_save == 0:
             g.eval()
-            torch.save({
+            checkpoint_writer.save({
                 "generator"              : g.state_dict(),
                 "discriminator"          : d.state_dict(),
                 "generator_optimizer"    : optimizer_g.state_dict(),
                 "discriminator_optimizer": optimizer_d.state_dict(),
                 "generator_scheduler"    : scheduler_g.state_dict(),
                 "discriminator_scheduler": scheduler_d.state_dict(),
+                "generator_ema"          : ema.state_dict() if ema is not None else None,
                 "step_counter"           : step_counter
-            }, os.path.join(model_save_dir, "checkpoint_{}.pt".format(step_counter)))
+            }, os.path.join(model_save_dir, "checkpoint_{}.pt".format(step_counter)), after_save=update_best_model)
             g.train()
-            delete_old_checkpoints(model_save_dir, keep=5)
-
-            checkpoint_paths = get_n_recent_checkpoints_paths(checkpoint_dir=model_save_dir, n=2)
-            averaged_model, _ = average_checkpoints(checkpoint_paths, load_func=load_net_bigvgan)
-            torch.save(averaged_model.state_dict(), os.path.join(model_save_dir, "best.pt"))
 
         # LOGGING
         log_dict = dict()
-        log_dict["Generator Loss"] = round(sum(generator_losses) / len(generator_losses), 3)
-        log_dict["Mel Loss"] = round(sum(mel_losses) / len(mel_losses), 3)
+        log_dict["Generator Loss"] = round(average_losses(generator_losses), 3)
+        log_dict["Mel Loss"] = round(average_losses(mel_losses), 3)
         if len(feat_match_losses) > 0:
-            log_dict["Feature Matching Loss"] = round(sum(feat_match_losses) / len(feat_match_losses), 3)
+            log_dict["Feature Matching Loss"] = round(average_losses(feat_match_losses), 3)
         if len(adversarial_losses) > 0:
-            log_dict["Adversarial Loss"] = round(sum(adversarial_losses) / len(adversarial_losses), 3)
+            log_dict["Adversarial Loss"] = round(average_losses(adversarial_losses), 3)
         if len(discriminator_losses) > 0:
-            log_dict["Discriminator Loss"] = round(sum(discriminator_losses) / len(discriminator_losses), 3)
+            log_dict["Discriminator Loss"] = round(average_losses(discriminator_losses), 3)
+        phase_times = phase_timer.summary()
+        log_dict.update({f"time/{phase}": round(seconds, 2) for phase, seconds in phase_times.items()})
 
         print("Time elapsed for this run:   {} Minutes".format(round((time.time() - start_time) / 60)))
         for key in log_dict:
-            print(f"{key}: {log_dict[key]}")
+            if not key.startswith("time/"):
+                print(f"{key}: {log_dict[key]}")
+        print_phase_times(phase_times)
 
         if use_wandb:
             wandb.log(log_dict, step=step_counter)
+        phase_timer.mark("checkpointing")
+
+    checkpoint_writer.wait()
+    profiler.stop()
@@ -1,3 +1,4 @@
+import math
 from collections import OrderedDict
 
 import torch
@@ -46,6 +47,32 @@ class CodecAudioPreprocessor:
     def indexes_to_audio(self, codebook_indexes):
         return self.model.decode(codebook_indexes).squeeze()
 
+    @torch.inference_mode()
+    def audio_batch_to_codebook_indexes(self, audio_batch, lengths, current_sampling_rate):
+        """
+        audio_batch is a zero-padded [batch x samples] tensor and lengths contains the number of samples of each item.
+        Returns a list with one [codebooks x frames] tensor per item, trimmed to the frames that belong to the item.
+        The padding can slightly change the last frames of the shorter items, so it's best to batch items of similar length.
+        """
+        lengths = torch.as_tensor(lengths).cpu()
+        if current_sampling_rate != self.output_sr:
+            audio_batch = self.resample_audio(audio_batch, current_sampling_rate)
+            lengths = torch.ceil(lengths * (self.output_sr / current_sampling_rate)).long()
+        codes = self.model.encode(audio_batch.float().unsqueeze(1).to(self.device))  # codebooks x batch x frames
+        hop_length = int(self.model.hop_length)
+        return [codes[:, index, :min(math.ceil(length / hop_length), codes.size(2))] for index, length in enumerate(lengths.tolist())]
+
+    @torch.inference_mode()
+    def indexes_batch_to_audio(self, codebook_indexes, lengths):
+        """
+        codebook_indexes is a padded [batch x codebooks x frames] tensor and lengths contains the number of frames of each item.
+        Returns a list with one waveform per item, trimmed to the samples that belong to the item.
+        """
+        lengths = torch.as_tensor(lengths).cpu()
+        waves = self.model.decode(codebook_indexes.transpose(0, 1).to(self.device)).squeeze(1)  # batch x samples
+        hop_length = int(self.model.hop_length)
+        return [waves[index, :length * hop_length] for index, length in enumerate(lengths.tolist())]
+
 
 def remove_encodec_weight_norm(model):
     from Preprocessing.Codec.seanet import SConv1d
@@ -946,6 +946,111 @@ def convert_kanji_to_pinyin_mandarin(text):
     return " ".join([x[0] for x in pinyin(text)])
 
 
+WORD_BOUNDARY_ID = 255  # the word boundary has no ID in the aligner's lookup, since it's never aligned, so it gets its own slot at the end of the compact ID space
+COMPACT_NASAL_BIT = 13  # the first 13 bits of the modifier bitfield are the 13 modifier dimensions of the articulatory vectors
+COMPACT_PALATAL_BIT = 14  # nasalization and palatalization can also be added to a phoneme as a modifier
+_compact_phoneme_lookups = None
+
+
+def get_compact_phoneme_lookups():
+    """
+    builds (once) the lookups between articulatory vectors and the compact
+    representation of a phoneme, which is a phoneme ID and a bitfield of modifiers.
+    """
+    global _compact_phoneme_lookups
+    if _compact_phoneme_lookups is None:
+        phone_to_vector = generate_feature_table()
+        phone_to_id = get_phone_to_id()
+        phone_to_id[" "] = WORD_BOUNDARY_ID
+        feature_to_index = get_feature_to_index_lookup()
+
+        id_to_vector = torch.zeros([WORD_BOUNDARY_ID + 1, len(feature_to_index)])
+        features_to_id = dict()
+        for phone in phone_to_vector:
+            id_to_vector[phone_to_id[phone]] = torch.Tensor(phone_to_vector[phone])
+            features_to_id[tuple(phone_to_vector[phone][13:])] = phone_to_id[phone]
+
+        # the aligner ignores word boundaries and nasalization of vowels, which depends on the modifiers. So we precompute the aligner ID for every combination of phoneme ID and additional nasal and palatal feature.
+        id_to_aligner_id = torch.full([WORD_BOUNDARY_ID + 1, 4], -1, dtype=torch.long)
+        for phoneme_id in range(WORD_BOUNDARY_ID + 1):
+            for variant in range(4):
+                features = id_to_vector[phoneme_id].tolist()
+                if sum(features) == 0 or features[feature_to_index["word-boundary"]] == 1:
+                    continue
+                if variant % 2 == 1:
+                    features[feature_to_index["nasal"]] = 1
+                if variant >= 2:
+                    features[feature_to_index["palatal"]] = 1
+                if features[feature_to_index["vowel"]] == 1 and features[feature_to_index["nasal"]] == 1:
+                    # for the sake of alignment, we ignore the difference between nasalized vowels and regular vowels
+                    features[feature_to_index["nasal"]] = 0
+                for phone in phone_to_vector:
+                    if features[13:] == phone_to_vector[phone][13:]:
+                        id_to_aligner_id[phoneme_id, variant] = phone_to_id[phone]
+                        break
+        _compact_phoneme_lookups = (id_to_vector, features_to_id, id_to_aligner_id)
+    return _compact_phoneme_lookups
+
+
+def text_vectors_to_compact_phonemes(text_vectors):
+    """
+    turns a sequence of articulatory vectors into a sequence of
+    pairs of phoneme ID and modifier bitfield, which is much
+    smaller to store.
+    """
+    _, features_to_id, _ = get_compact_phoneme_lookups()
+    nasal_index = get_feature_to_index_lookup()["nasal"]
+    palatal_index = get_feature_to_index_lookup()["palatal"]
+    compact_phonemes = list()
+    for vector in torch.as_tensor(text_vectors).int().tolist():
+        modifiers = sum(1 << modifier_index for modifier_index in range(13) if vector[modifier_index] == 1)
+        features = vector[13:]
+        # nasal and palatal can be added as modifiers, in which case we need to remove them to find the phoneme they were added to
+        for remove_nasal, remove_palatal in [(False, False), (True, False), (False, True), (True, True)]:
+            if (remove_nasal and features[nasal_index - 13] == 0) or (remove_palatal and features[palatal_index - 13] == 0):
+                continue
+            candidate = list(features)
+            if remove_nasal:
+                candidate[nasal_index - 13] = 0
+            if remove_palatal:
+                candidate[palatal_index - 13] = 0
+            if tuple(candidate) in features_to_id:
+                modifiers = modifiers | (remove_nasal << COMPACT_NASAL_BIT) | (remove_palatal << COMPACT_PALATAL_BIT)
+                compact_phonemes.append([features_to_id[tuple(candidate)], modifiers])
+                break
+        else:
+            raise KeyError(f"No phoneme matches the articulatory vector {vector}")
+    return torch.ShortTensor(compact_phonemes).view(-1, 2)
+
+
+def compact_phonemes_to_text_vectors(compact_phonemes):
+    """
+    inverse of text_vectors_to_compact_phonemes
+    """
+    id_to_vector, _, _ = get_compact_phoneme_lookups()
+    phoneme_ids = compact_phonemes[..., 0].long().cpu()
+    modifiers = compact_phonemes[..., 1].long().cpu()
+    text_vectors = id_to_vector[phoneme_ids]
+    text_vectors[..., :13] = ((modifiers.unsqueeze(-1) >> torch.arange(13)) & 1).float()
+    nasal_index = get_feature_to_index_lookup()["nasal"]
+    palatal_index = get_feature_to_index_lookup()["palatal"]
+    text_vectors[..., nasal_index] = torch.maximum(text_vectors[..., nasal_index], ((modifiers >> COMPACT_NASAL_BIT) & 1).float())
+    text_vectors[..., palatal_index] = torch.maximum(text_vectors[..., palatal_index], ((modifiers >> COMPACT_PALATAL_BIT) & 1).float())
+    return text_vectors
+
+
+def compact_phonemes_to_aligner_ids(compact_phonemes):
+    """
+    does the same as text_vectors_to_id_sequence, but with a lookup instead of a search
+    """
+    _, _, id_to_aligner_id = get_compact_phoneme_lookups()
+    phoneme_ids = compact_phonemes[:, 0].long().cpu()
+    modifiers = compact_phonemes[:, 1].long().cpu()
+    variants = ((modifiers >> COMPACT_NASAL_BIT) & 1) + 2 * ((modifiers >> COMPACT_PALATAL_BIT) & 1)
+    aligner_ids = id_to_aligner_id[phoneme_ids, variants]
+    return aligner_ids[aligner_ids != -1]
+
+
 def get_language_id(language):
     try:
         iso_codes_to_ids = load_json_from_path("Preprocessing/multilinguality/iso_lookup.json")[-1]
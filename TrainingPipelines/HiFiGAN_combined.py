@@ -9,6 +9,7 @@ from Architectures.Vocoder.HiFiGAN_Generator import HiFiGAN
 from Architectures.Vocoder.HiFiGAN_train_loop import train_loop
 from Utility.path_to_transcript_dicts import *
 from Utility.storage_config import MODELS_DIR
+from Utility.storage_config import PREPROCESSING_DIR
 
 
 def run(gpu_id, resume_checkpoint, finetune, resume, model_dir, use_wandb, wandb_resume_id, gpu_count):
@@ -18,9 +19,12 @@ def run(gpu_id, resume_checkpoint, finetune, resume, model_dir, use_wandb, wandb
         device = torch.device("cuda")
 
     if gpu_count > 1:
-        print("Multi GPU training not supported for HiFiGAN!")
-        import sys
-        sys.exit()
+        rank = int(os.environ["LOCAL_RANK"])
+        torch.cuda.set_device(rank)
+        torch.distributed.init_process_group(backend="nccl")
+        random.seed(0)  # all processes have to select the same files, the sampler then splits them up
+    else:
+        rank = 0
 
     print("Preparing")
     if model_dir is not None:
@@ -254,13 +258,16 @@ def run(gpu_id, resume_checkpoint, finetune, resume, model_dir, use_wandb, wandb
     fisher_yates_shuffle(selection)
     fisher_yates_shuffle(selection)
 
-    train_set = HiFiGANDataset(list_of_paths=selection, use_random_corruption=True)
+    train_set = HiFiGANDataset(list_of_paths=selection,
+                               cache_dir=os.path.join(PREPROCESSING_DIR, "HiFiGAN_combined"),
+                               use_random_corruption=True,
+                               gpu_count=gpu_count)  # packing the waves takes hours, so it has to be done in a single GPU run before the multi-GPU training
 
     generator = HiFiGAN()
     discriminator = AvocodoHiFiGANJointDiscriminator()
 
     print("Training model")
-    if use_wandb:
+    if use_wandb and rank == 0:
         wandb.init(
             name=f"{__name__.split('.')[-1]}_{time.strftime('%Y%m%d-%H%M%S')}" if wandb_resume_id is None else None,
             id=wandb_resume_id,  # this is None if not specified in the command line arguments.
@@ -276,8 +283,10 @@ def run(gpu_id, resume_checkpoint, finetune, resume, model_dir, use_wandb, wandb
                path_to_checkpoint=resume_checkpoint,
                resume=resume,
                use_wandb=use_wandb,
-               finetune=finetune)
-    if use_wandb:
+               finetune=finetune,
+               gpu_count=gpu_count,
+               rank=rank)
+    if use_wandb and rank == 0:
         wandb.finish()
 
 
@@ -50,7 +50,7 @@ def run(gpu_id, resume_checkpoint, finetune, model_dir, resume, use_wandb, wandb
             model,
             device_ids=[rank],
             output_device=rank,
-            find_unused_parameters=True,
+            find_unused_parameters=False,  # all parameters get a gradient in every step, see the forward of ToucanTTS
         )
         torch.distributed.barrier()
     train_sampler = torch.utils.data.RandomSampler(train_set)
@@ -167,19 +167,15 @@ def run(gpu_id, resume_checkpoint, finetune, model_dir, resume, use_wandb, wandb
 
     model = ToucanTTS()
 
-    train_samplers = list()
     if gpu_count > 1:
         model.to(rank)
         model = torch.nn.parallel.DistributedDataParallel(
             model,
             device_ids=[rank],
             output_device=rank,
-            find_unused_parameters=True,
+            find_unused_parameters=False,  # all parameters get a gradient in every step, see the forward of ToucanTTS
         )
         torch.distributed.barrier()
-    for train_set in re_ordered_datasets:
-        train_samplers.append(torch.utils.data.RandomSampler(train_set))
-
     if use_wandb:
         if rank == 0:
             wandb.init(
@@ -199,7 +195,6 @@ def run(gpu_id, resume_checkpoint, finetune, model_dir, resume, use_wandb, wandb
                steps_per_checkpoint=1000,
                lr=0.00001,
                use_wandb=use_wandb,
-               train_samplers=train_samplers,
                gpu_count=gpu_count)
     if use_wandb:
         wandb.finish()
\ No newline at end of file
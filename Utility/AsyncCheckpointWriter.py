@@ -0,0 +1,59 @@
+import threading
+
+import torch
+
+
+class AsyncCheckpointWriter:
+    """
+    Writes checkpoints on a background thread, so the training can continue
+    while the file is written. The state is copied to the CPU before the
+    thread starts, so the training can change the parameters right away.
+
+    Only one checkpoint is written at a time. Submitting a new one first waits
+    for the previous one, so checkpoints never pile up in memory.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.exception = None
+
+    def save(self, state, path, after_save=None):
+        """
+        takes a CPU snapshot of the state and writes it to the path in the background.
+        after_save is called with the snapshot on the same thread once the file is
+        written, e.g. to delete old checkpoints or to write the model for use.
+        """
+        self.wait()
+        snapshot = cpu_snapshot(state)
+        self.thread = threading.Thread(target=self._write, args=(snapshot, path, after_save), daemon=False)
+        self.thread.start()
+
+    def _write(self, snapshot, path, after_save):
+        try:
+            torch.save(snapshot, path)
+            if after_save is not None:
+                after_save(snapshot)
+        except Exception as e:
+            self.exception = e
+
+    def wait(self):
+        """
+        blocks until the checkpoint that is currently written is done. Has to be called before the training ends.
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.exception is not None:
+            exception = self.exception
+            self.exception = None
+            raise exception
+
+
+def cpu_snapshot(state):
+    if isinstance(state, torch.Tensor):
+        return state.detach().to("cpu", copy=True)
+    if isinstance(state, dict):
+        return type(state)((key, cpu_snapshot(value)) for key, value in state.items())
+    if isinstance(state, (list, tuple)):
+        return type(state)(cpu_snapshot(value) for value in state)
+    return state
@@ -0,0 +1,91 @@
+import queue
+import threading
+
+import torch
+
+
+class BatchPrefetcher:
+    """
+    Assembles the next batches on a background thread while the current
+    step computes. On a GPU, the tensors of a batch are pinned and copied
+    to the device asynchronously on a separate stream, so the training
+    loop gets batches that already are (or are about to be) on the device.
+
+    Works with anything that can be iterated over, e.g. a DataLoader with
+    num_workers=0, or a generator that collates batches itself.
+    """
+
+    def __init__(self, iterable, device, queue_size=2):
+        self.iterable = iterable
+        self.device = torch.device(device)
+        self.queue_size = queue_size
+        self.use_cuda = self.device.type == "cuda" and torch.cuda.is_available()
+
+    def __len__(self):
+        return len(self.iterable)
+
+    def __iter__(self):
+        batch_queue = queue.Queue(maxsize=self.queue_size)
+        stop_event = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(batch_queue, stop_event), daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = batch_queue.get()
+                if item is None:
+                    return
+                batch, event, exception = item
+                if exception is not None:
+                    raise exception
+                if event is not None:
+                    current_stream = torch.cuda.current_stream(self.device)
+                    current_stream.wait_event(event)
+                    _record_stream(batch, current_stream)  # the memory was allocated on the side stream, so the caching allocator needs to know that it's used here
+                yield batch
+        finally:
+            stop_event.set()  # also happens when the loop over the batches is left early
+
+    def _produce(self, batch_queue, stop_event):
+        stream = torch.cuda.Stream(self.device) if self.use_cuda else None
+        try:
+            for batch in self.iterable:
+                event = None
+                if self.use_cuda:
+                    with torch.cuda.stream(stream):
+                        batch = _to_device(batch, self.device)
+                        event = torch.cuda.Event()
+                        event.record(stream)
+                if not _put(batch_queue, (batch, event, None), stop_event):
+                    return
+        except Exception as e:
+            _put(batch_queue, (None, None, e), stop_event)
+            return
+        _put(batch_queue, None, stop_event)
+
+
+def _put(batch_queue, item, stop_event):
+    while not stop_event.is_set():
+        try:
+            batch_queue.put(item, timeout=1.0)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _to_device(batch, device):
+    if isinstance(batch, torch.Tensor):
+        if batch.device.type == "cpu":
+            batch = batch.pin_memory()
+        return batch.to(device, non_blocking=True)
+    if isinstance(batch, (list, tuple)):
+        return type(batch)(_to_device(element, device) for element in batch)
+    return batch
+
+
+def _record_stream(batch, stream):
+    if isinstance(batch, torch.Tensor):
+        batch.record_stream(stream)
+    elif isinstance(batch, (list, tuple)):
+        for element in batch:
+            _record_stream(element, stream)
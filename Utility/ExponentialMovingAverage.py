@@ -0,0 +1,41 @@
+import torch
+
+
+class ExponentialMovingAverage:
+    """
+    Keeps an exponential moving average of the weights of a model during
+    training. The averaged weights usually sound smoother than the weights
+    of any single step, so they are what gets saved as the model for use.
+
+    The shadow weights live on the same device as the model and are updated
+    in place after every optimizer step. At the beginning of the training,
+    the decay is lower, so the average isn't dominated by the random init.
+    """
+
+    def __init__(self, model, decay=0.999):
+        self.decay = decay
+        self.num_updates = 0
+        self.shadow = {name: tensor.detach().clone() for name, tensor in model.state_dict().items()}
+        # the parameters are updated in place by the optimizers, so they only need to be collected once
+        self.parameter_names = [name for name, _ in model.named_parameters() if name in self.shadow]
+        self.parameters = [parameter for name, parameter in model.named_parameters() if name in self.shadow]
+        self.shadow_parameters = [self.shadow[name] for name in self.parameter_names]
+
+    @torch.no_grad()
+    def update(self, model):
+        self.num_updates += 1
+        decay = min(self.decay, (1 + self.num_updates) / (10 + self.num_updates))
+        torch._foreach_lerp_(self.shadow_parameters, [parameter.detach() for parameter in self.parameters], 1.0 - decay)
+        for name, buffer in model.named_buffers():
+            if name in self.shadow:
+                self.shadow[name].copy_(buffer)  # buffers (e.g. running statistics) are not averaged, they are simply taken over
+
+    def state_dict(self):
+        return {"decay": self.decay, "num_updates": self.num_updates, "shadow": self.shadow}
+
+    def load_state_dict(self, state_dict):
+        self.decay = state_dict["decay"]
+        self.num_updates = state_dict["num_updates"]
+        for name, tensor in state_dict["shadow"].items():
+            if name in self.shadow:
+                self.shadow[name].copy_(tensor)
@@ -0,0 +1,92 @@
+import json
+import os
+
+import numpy
+import torch
+
+
+class FeatureStoreWriter:
+    """
+    Appends variable length feature matrices (e.g. spectrograms) to one packed
+    file on disk. The offsets are only written once the writer is closed, so a
+    store that was not closed properly is not picked up by the reader.
+    """
+
+    def __init__(self, path, feature_dim, dtype="float16"):
+        self.path = path
+        self.feature_dim = feature_dim
+        self.dtype = numpy.dtype(dtype)
+        self.offsets = list()
+        self.current_offset = 0
+        for file in [path + ".bin", path + "_index.npy", path + ".json"]:
+            if os.path.exists(file):
+                os.remove(file)
+        self.data_file = open(path + ".bin", "wb")
+
+    def append(self, features):
+        """
+        adds a [length x feature_dim] matrix and returns the index under which it can be read again
+        """
+        if isinstance(features, torch.Tensor):
+            features = features.detach().cpu().numpy()
+        features = numpy.ascontiguousarray(features.reshape(-1, self.feature_dim), dtype=self.dtype)
+        self.data_file.write(features.tobytes())
+        self.offsets.append([self.current_offset, len(features)])
+        self.current_offset += len(features)
+        return len(self.offsets) - 1
+
+    def close(self):
+        self.data_file.close()
+        numpy.save(self.path + "_index.npy", numpy.array(self.offsets, dtype=numpy.int64).reshape(-1, 2))
+        with open(self.path + ".json", "w", encoding="utf8") as f:
+            json.dump({"feature_dim": self.feature_dim, "dtype": self.dtype.name}, f)
+
+
+class FeatureStore:
+    """
+    Read access to the features written by a FeatureStoreWriter. The data
+    is memory-mapped, so only the items that are actually read are loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path + ".json", "r", encoding="utf8") as f:
+            meta = json.load(f)
+        self.feature_dim = meta["feature_dim"]
+        self.dtype = numpy.dtype(meta["dtype"])
+        self.offsets = numpy.load(path + "_index.npy")
+        self.data = None  # opened lazily, so that every process that uses the store gets its own mapping
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(path + ".json") and os.path.exists(path + "_index.npy") and os.path.exists(path + ".bin")
+
+    def _open(self):
+        if self.data is None:
+            self.data = numpy.memmap(self.path + ".bin", dtype=self.dtype, mode="r").reshape(-1, self.feature_dim)
+
+    def __getitem__(self, index):
+        self._open()
+        offset, length = self.offsets[index]
+        return torch.from_numpy(numpy.array(self.data[offset:offset + length], dtype=numpy.float32))
+
+    def get_length(self, index):
+        return int(self.offsets[index][1])
+
+    def get_slice(self, index, start, length):
+        """
+        reads only the rows [start, start + length) of an item, without touching the rest of it
+        """
+        self._open()
+        offset, item_length = self.offsets[index]
+        start = max(0, min(start, item_length))
+        end = min(start + length, item_length)
+        return torch.from_numpy(numpy.array(self.data[offset + start:offset + end], dtype=numpy.float32))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["data"] = None
+        return state
@@ -0,0 +1,87 @@
+import math
+
+import torch
+from torch.utils.data import ConcatDataset
+from torch.utils.data import Sampler
+
+
+def get_dataset_lengths(dataset):
+    """
+    collects the lengths that the datasets know from their caches,
+    also through (nested) concat datasets.
+    """
+    if isinstance(dataset, ConcatDataset):
+        lengths = list()
+        for sub_dataset in dataset.datasets:
+            lengths += get_dataset_lengths(sub_dataset)
+        return lengths
+    return dataset.get_lengths()
+
+
+class LengthBucketBatchSampler(Sampler):
+    """
+    Forms batches of datapoints with similar length, so that as little
+    compute as possible is spent on padding.
+
+    The indexes are shuffled and cut into large chunks, every chunk is sorted
+    by length and cut into batches and then the order of the batches is
+    shuffled. So the batches are still random, but their members are similar.
+    Like a BatchSampler with drop_last=True, it always yields
+    len(lengths) // batch_size batches.
+    """
+
+    def __init__(self, lengths, batch_size, bucket_size_multiplier=100, seed=0):
+        self.lengths = lengths
+        self.batch_size = batch_size
+        self.bucket_size = batch_size * bucket_size_multiplier
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _get_indexes(self, generator):
+        return torch.randperm(len(self.lengths), generator=generator).tolist()
+
+    def __iter__(self):
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + self.epoch)
+        self.epoch += 1  # so that the next epoch looks different, even if set_epoch is never called
+        indexes = self._get_indexes(generator)
+
+        sorted_indexes = list()
+        for bucket_start in range(0, len(indexes), self.bucket_size):
+            sorted_indexes += sorted(indexes[bucket_start:bucket_start + self.bucket_size], key=lambda index: self.lengths[index])
+        batches = [sorted_indexes[batch_start:batch_start + self.batch_size] for batch_start in range(0, len(self) * self.batch_size, self.batch_size)]
+        batches = [batches[i] for i in torch.randperm(len(batches), generator=generator).tolist()]
+        return iter(batches)
+
+    def __len__(self):
+        return len(self.lengths) // self.batch_size
+
+
+class DistributedLengthBucketBatchSampler(LengthBucketBatchSampler):
+    """
+    Same as the LengthBucketBatchSampler, but every process only gets its
+    share of the dataset, like with a DistributedSampler. All processes use
+    the same seed, so they agree on the split, and they all get the same
+    amount of batches.
+    """
+
+    def __init__(self, lengths, batch_size, bucket_size_multiplier=100, seed=0, num_replicas=None, rank=None):
+        super().__init__(lengths=lengths, batch_size=batch_size, bucket_size_multiplier=bucket_size_multiplier, seed=seed)
+        if num_replicas is None:
+            num_replicas = torch.distributed.get_world_size()
+        if rank is None:
+            rank = torch.distributed.get_rank()
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.num_samples = math.floor(len(self.lengths) / self.num_replicas)
+
+    def _get_indexes(self, generator):
+        indexes = torch.randperm(len(self.lengths), generator=generator).tolist()
+        indexes = indexes[:self.num_samples * self.num_replicas]  # the remainder is dropped, so that every process gets the same amount
+        return indexes[self.rank::self.num_replicas]
+
+    def __len__(self):
+        return self.num_samples // self.batch_size
@@ -13,7 +13,9 @@ from tqdm import tqdm
 from Architectures.ToucanTTS.ToucanTTS import ToucanTTS
 from Preprocessing.AudioPreprocessor import AudioPreprocessor
 from Preprocessing.EnCodecAudioPreprocessor import CodecAudioPreprocessor
+from Preprocessing.TextFrontend import compact_phonemes_to_text_vectors
 from Utility.corpus_preparation import prepare_tts_corpus
+from Utility.utils import speech_batch_to_mels
 
 
 class TTSScorer:
@@ -48,21 +50,21 @@ class TTSScorer:
         self.path_to_score = dict()
         self.path_to_id = dict()
         _ = dataset[0]
+        decoding_batch_size = 16
         for index in tqdm(range(len(dataset.datapoints))):
+            if index % decoding_batch_size == 0:
+                # the spectrograms are decoded in batches, ahead of the samples that are scored one by one
+                mels = speech_batch_to_mels([dataset[i][2] for i in range(index, min(index + decoding_batch_size, len(dataset.datapoints)))], self.ap, self.spec_extractor)
             datapoint = dataset.datapoints[index]
-            text_tensors = datapoint[0].to(self.device).unsqueeze(0).float()
+            text_tensors = compact_phonemes_to_text_vectors(datapoint[0]).to(self.device).unsqueeze(0).float()
             text_lengths = datapoint[1].squeeze().to(self.device).unsqueeze(0)
-            speech_indexes = datapoint[2]
             speech_lengths = datapoint[3].squeeze().to(self.device).unsqueeze(0)
             gold_durations = datapoint[4].to(self.device).unsqueeze(0)
             gold_pitch = datapoint[6].to(self.device).unsqueeze(0)  # mind the switched order
             gold_energy = datapoint[5].to(self.device).unsqueeze(0)  # mind the switched order
             lang_ids = dataset.language_id.to(self.device)
             filepath = datapoint[8]
-            with torch.inference_mode():
-                wave = self.ap.indexes_to_audio(speech_indexes.int().to(self.device)).detach()
-                mel = self.spec_extractor.audio_to_mel_spec_tensor(wave, explicit_sampling_rate=16000).transpose(0, 1).detach().cpu()
-            gold_speech_sample = mel.clone().to(self.device).unsqueeze(0)
+            gold_speech_sample = mels[index % decoding_batch_size].to(self.device).unsqueeze(0)
 
             utterance_embedding = datapoint[7].unsqueeze(0).to(self.device)
             try:
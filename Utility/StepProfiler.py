@@ -0,0 +1,92 @@
+import os
+import time
+
+import torch
+
+# set from the command line of run_training_pipeline.py, so that the pipelines don't need to pass it through
+profiling_settings = {"enabled": False, "wait_steps": 50, "active_steps": 5}
+
+
+def enable_profiling(wait_steps=50, active_steps=5):
+    """
+    makes the train loops time the phases of every step precisely and
+    record a trace with the torch profiler for a window of steps.
+    The steps before the window are skipped, so that e.g. the compilation
+    or the allocation of the caches at the beginning don't show up.
+    """
+    profiling_settings["enabled"] = True
+    profiling_settings["wait_steps"] = wait_steps
+    profiling_settings["active_steps"] = active_steps
+
+
+class PhaseTimer:
+    """
+    Adds up the wall time that the steps of a train loop spend in each of
+    their phases. A phase is marked when it ends, so it gets the time since
+    the end of the previous phase.
+
+    The GPU works asynchronously, so its work is usually only waited for
+    in a later phase. When profiling is enabled, the device is synchronized
+    at every mark, which makes the times precise, but the training slower.
+    """
+
+    def __init__(self, device):
+        self.device = torch.device(device)
+        self.synchronize = profiling_settings["enabled"] and self.device.type == "cuda"
+        self.times = dict()
+        self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        if self.synchronize:
+            torch.cuda.synchronize(self.device)
+        now = time.perf_counter()
+        self.times[phase] = self.times.get(phase, 0.0) + now - self.last_mark
+        self.last_mark = now
+
+    def summary(self):
+        """
+        returns the seconds spent in each phase since the last summary and starts counting anew
+        """
+        times = self.times
+        self.times = dict()
+        return times
+
+
+def print_phase_times(phase_times):
+    total = sum(phase_times.values())
+    for phase, seconds in phase_times.items():
+        print(f"{phase + ':':<40}{round(seconds, 1)}s ({round(100 * seconds / max(total, 1e-8))}%)")
+
+
+class _NoProfiler:
+
+    def start(self):
+        pass
+
+    def step(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def get_trace_profiler(trace_dir):
+    """
+    returns a torch profiler that records the window of steps that is configured with enable_profiling
+    and writes the trace into the given directory (it can be viewed with tensorboard), or a profiler that does nothing.
+    step() has to be called after every training step.
+    """
+    if not profiling_settings["enabled"]:
+        return _NoProfiler()
+    os.makedirs(trace_dir, exist_ok=True)
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    return torch.profiler.profile(activities=activities,
+                                  schedule=torch.profiler.schedule(wait=profiling_settings["wait_steps"],
+                                                                   warmup=1,
+                                                                   active=profiling_settings["active_steps"],
+                                                                   repeat=1),
+                                  on_trace_ready=torch.profiler.tensorboard_trace_handler(trace_dir),
+                                  record_shapes=True,
+                                  with_stack=False)
@@ -0,0 +1,65 @@
+import torch
+
+
+class TemperatureWeightedBatchSampler(torch.utils.data.Sampler):
+    """
+    Endless batch sampler over the global index of a ConcatDataset that
+    consists of one dataset per task (i.e. language).
+
+    For every sample, a task is drawn with probability proportional to
+    (n_i / N) ** (1 / temperature), where n_i is the size of the task and N
+    the size of all tasks together. A temperature of 1 samples proportional
+    to the size of the tasks, higher temperatures flatten the distribution
+    and a temperature of None samples all tasks uniformly. Within a task,
+    the samples are drawn from a permutation that is renewed once it is used
+    up, so every sample of a task is seen once before any is repeated.
+
+    If lengths are given, the samples of multiple batches are drawn at once
+    and the ones of similar length are put into the same batch.
+
+    With multiple processes, every process needs its own seed, otherwise
+    they all draw the same batches.
+    """
+
+    def __init__(self, dataset_sizes, batch_size, temperature=None, lengths=None, length_bucket_pool_size=32, seed=0):
+        self.dataset_sizes = dataset_sizes
+        self.batch_size = batch_size
+        self.lengths = lengths
+        self.length_bucket_pool_size = length_bucket_pool_size
+        self.generator = torch.Generator()
+        self.generator.manual_seed(seed)
+
+        sizes = torch.tensor(dataset_sizes, dtype=torch.float64)
+        if temperature is None:
+            self.task_probabilities = torch.ones_like(sizes) / len(sizes)
+        else:
+            weights = (sizes / sizes.sum()) ** (1.0 / temperature)
+            self.task_probabilities = weights / weights.sum()
+        self.offsets = [0]
+        for size in dataset_sizes[:-1]:
+            self.offsets.append(self.offsets[-1] + size)
+
+        self.permutations = [None] * len(dataset_sizes)
+        self.positions = [0] * len(dataset_sizes)
+
+    def _next_index(self, task):
+        if self.permutations[task] is None or self.positions[task] >= len(self.permutations[task]):
+            self.permutations[task] = torch.randperm(self.dataset_sizes[task], generator=self.generator).tolist()
+            self.positions[task] = 0
+        index = self.permutations[task][self.positions[task]]
+        self.positions[task] += 1
+        return self.offsets[task] + index
+
+    def _draw_indexes(self, amount):
+        tasks = torch.multinomial(self.task_probabilities, amount, replacement=True, generator=self.generator).tolist()
+        return [self._next_index(task) for task in tasks]
+
+    def __iter__(self):
+        while True:
+            if self.lengths is None:
+                yield self._draw_indexes(self.batch_size)
+            else:
+                pool = sorted(self._draw_indexes(self.batch_size * self.length_bucket_pool_size), key=lambda index: self.lengths[index])
+                batches = [pool[batch_start:batch_start + self.batch_size] for batch_start in range(0, len(pool), self.batch_size)]
+                for batch_index in torch.randperm(len(batches), generator=self.generator).tolist():
+                    yield batches[batch_index]
@@ -9,7 +9,10 @@ from Utility.storage_config import MODELS_DIR
 
 def prepare_aligner_corpus(transcript_dict, corpus_dir, lang, device, phone_input=False,
                            gpu_count=1,
-                           rank=0):
+                           rank=0,
+                           precompute_mels=False,
+                           save_waves=False,
+                           shard_across_ranks=True):
     return CodecAlignerDataset(transcript_dict,
                                cache_dir=corpus_dir,
                                lang=lang,
@@ -17,7 +20,10 @@ def prepare_aligner_corpus(transcript_dict, corpus_dir, lang, device, phone_inpu
                                device=device,
                                phone_input=phone_input,
                                gpu_count=gpu_count,
-                               rank=rank)
+                               rank=rank,
+                               precompute_mels=precompute_mels,
+                               save_waves=save_waves,
+                               shard_across_ranks=shard_across_ranks)
 
 
 def prepare_tts_corpus(transcript_dict,
@@ -29,7 +35,9 @@ def prepare_tts_corpus(transcript_dict,
                        phone_input=False,
                        save_imgs=False,
                        gpu_count=1,
-                       rank=0):
+                       rank=0,
+                       # Decodes every sample only once and keeps the spectrograms on disk. Costs a lot of disk space, but saves a lot of time during training.
+                       precompute_mels=False):
     """
     create an aligner dataset,
     fine-tune an aligner,
@@ -44,10 +52,11 @@ def prepare_tts_corpus(transcript_dict,
             aligner_loc = os.path.join(corpus_dir, "Aligner", "aligner.pt")
 
             if not os.path.exists(os.path.join(corpus_dir, "aligner_train_cache.pt")):
-                prepare_aligner_corpus(transcript_dict, corpus_dir=corpus_dir, lang=lang, phone_input=phone_input, device=torch.device("cuda"))
+                # the normalized waves are kept, so the TTS features don't have to be computed from decoded codes
+                prepare_aligner_corpus(transcript_dict, corpus_dir=corpus_dir, lang=lang, phone_input=phone_input, device=torch.device("cuda"), save_waves=True)
 
             if not os.path.exists(os.path.join(aligner_dir, "aligner.pt")):
-                aligner_datapoints = prepare_aligner_corpus(transcript_dict, corpus_dir=corpus_dir, lang=lang, phone_input=phone_input, device=torch.device("cuda"))
+                aligner_datapoints = prepare_aligner_corpus(transcript_dict, corpus_dir=corpus_dir, lang=lang, phone_input=phone_input, device=torch.device("cuda"), precompute_mels=precompute_mels, save_waves=True)
                 if os.path.exists(os.path.join(MODELS_DIR, "Aligner", "aligner.pt")):
                     train_aligner(train_dataset=aligner_datapoints,
                                   device=torch.device("cuda"),
@@ -81,4 +90,5 @@ def prepare_tts_corpus(transcript_dict,
                       lang=lang,
                       save_imgs=save_imgs,
                       gpu_count=gpu_count,
-                      rank=rank)
+                      rank=rank,
+                      precompute_mels=precompute_mels)
@@ -2,6 +2,7 @@ import librosa
 import soundfile as sf
 from tqdm import tqdm
 
+from Preprocessing.TextFrontend import compact_phonemes_to_text_vectors
 from Preprocessing.TextFrontend import get_feature_to_index_lookup
 from Utility.path_to_transcript_dicts import *
 
@@ -27,7 +28,7 @@ def make_silence_cleaned_versions(train_sets):
     for train_set in train_sets:
         for index in tqdm(range(len(train_set))):
             filepath = train_set.datapoints[index][8]
-            phonemes = train_set.datapoints[index][0]
+            phonemes = compact_phonemes_to_text_vectors(train_set.datapoints[index][0])
             speech_length = train_set.datapoints[index][3]
             durations = train_set.datapoints[index][4]
             cumsum = 0
@@ -236,7 +236,7 @@ def get_most_recent_checkpoint(checkpoint_dir, verbose=True):
     return os.path.join(checkpoint_dir, "checkpoint_{}.pt".format(checkpoint_list[0]))
 
 
-def make_pad_mask(lengths, xs=None, length_dim=-1, device=None):
+def make_pad_mask(lengths, xs=None, length_dim=-1, device=None, maxlen=None):
     """
     Make mask tensor containing indices of padded part.
 
@@ -246,6 +246,9 @@ def make_pad_mask(lengths, xs=None, length_dim=-1, device=None):
             If set, masks will be the same shape as this tensor.
         length_dim (int, optional): Dimension indicator of the above tensor.
             See the example.
+        maxlen (int, optional): The length of the mask. If it is given together with
+            lengths as a tensor, the mask is built without moving the lengths to the host,
+            so there is no synchronization and no graph break in a compiled model.
 
     Returns:
         Tensor: Mask tensor containing indices of padded part.
@@ -256,6 +259,10 @@ def make_pad_mask(lengths, xs=None, length_dim=-1, device=None):
     if length_dim == 0:
         raise ValueError("length_dim cannot be 0: {}".format(length_dim))
 
+    if maxlen is not None and xs is None and isinstance(lengths, torch.Tensor):
+        seq_range = torch.arange(0, maxlen, dtype=torch.int64, device=lengths.device if device is None else device)
+        return seq_range.unsqueeze(0) >= lengths.view(-1, 1).to(seq_range.device)
+
     if not isinstance(lengths, list):
         lengths = lengths.tolist()
     bs = int(len(lengths))
@@ -283,7 +290,7 @@ def make_pad_mask(lengths, xs=None, length_dim=-1, device=None):
     return mask
 
 
-def make_non_pad_mask(lengths, xs=None, length_dim=-1, device=None):
+def make_non_pad_mask(lengths, xs=None, length_dim=-1, device=None, maxlen=None):
     """
     Make mask tensor containing indices of non-padded part.
 
@@ -293,6 +300,7 @@ def make_non_pad_mask(lengths, xs=None, length_dim=-1, device=None):
             If set, masks will be the same shape as this tensor.
         length_dim (int, optional): Dimension indicator of the above tensor.
             See the example.
+        maxlen (int, optional): The length of the mask, see make_pad_mask.
 
     Returns:
         ByteTensor: mask tensor containing indices of padded part.
@@ -300,7 +308,7 @@ def make_non_pad_mask(lengths, xs=None, length_dim=-1, device=None):
                     dtype=torch.bool in PyTorch 1.2+ (including 1.2)
 
     """
-    return ~make_pad_mask(lengths, xs, length_dim, device=device)
+    return ~make_pad_mask(lengths, xs, length_dim, device=device, maxlen=maxlen)
 
 
 def initialize(model, init):
@@ -364,6 +372,27 @@ def pad_list(xs, pad_value):
     return pad
 
 
+def pad_to_multiple(xs, multiple, dim=1, pad_value=0.0):
+    """
+    Pads a batch along the given dimension, so that its size is a multiple of the given number.
+    This bounds the number of distinct shapes, which a compiled model would otherwise have to be recompiled for.
+
+    Args:
+        xs (Tensor): Padded batch, e.g. (B, Tmax, `*`).
+        multiple (int or None): The size of the dimension is rounded up to a multiple of this. None leaves the batch as it is.
+        dim (int): The dimension to pad.
+        pad_value (float): Value for padding.
+
+    Returns:
+        Tensor: Padded tensor.
+    """
+    if multiple is None or xs.size(dim) % multiple == 0:
+        return xs
+    pad_shape = list(xs.size())
+    pad_shape[dim] = multiple - xs.size(dim) % multiple
+    return torch.cat([xs, xs.new_full(pad_shape, pad_value)], dim=dim)
+
+
 def curve_smoother(curve):
     if len(curve) < 3:
         return curve
@@ -404,6 +433,48 @@ def remove_elements(tensor, indexes):
     return result
 
 
+def speech_batch_to_mels(speech_batch, codec_wrapper, spec_extractor):
+    """
+    turns a list of codec index tensors into spectrograms, decoding all of them in one batch.
+    Items that already are precomputed spectrograms are passed through.
+    """
+    mels = [speech.to(codec_wrapper.device) if speech.is_floating_point() else None for speech in speech_batch]
+    indexes_to_decode = [index for index, mel in enumerate(mels) if mel is None]
+    if len(indexes_to_decode) > 0:
+        codes = [speech_batch[index] for index in indexes_to_decode]
+        padded_codes = torch.nn.utils.rnn.pad_sequence([code.transpose(0, 1) for code in codes], batch_first=True).transpose(1, 2)
+        with torch.inference_mode():
+            waves = codec_wrapper.indexes_batch_to_audio(padded_codes.int(), lengths=[code.size(1) for code in codes])
+            decoded_mels = [spec_extractor.audio_to_mel_spec_tensor(wave, explicit_sampling_rate=16000).transpose(0, 1) for wave in waves]
+        for index, mel in zip(indexes_to_decode, decoded_mels):
+            mels[index] = mel.clone()  # cloning outside of inference mode, so the result can be used in training
+    return mels
+
+
+def average_losses(losses):
+    """
+    averages a list of losses that were collected as detached tensors on the device.
+    This is the only point where the device has to be synchronized.
+    """
+    return torch.stack([loss.float() for loss in losses]).mean().item()
+
+
+def get_autocast_dtype(precision, device):
+    """
+    maps the precision argument of the train loops to the dtype that autocast should use. None means full precision.
+    """
+    if precision == "fp32":
+        return None
+    if precision == "bf16":
+        return torch.bfloat16
+    if precision == "fp16":
+        if torch.device(device).type != "cuda":
+            print("fp16 mixed precision is only supported on GPUs, using bf16 instead.")
+            return torch.bfloat16
+        return torch.float16
+    raise ValueError(f"unknown precision: {precision}, please use one of fp32, bf16 or fp16")
+
+
 def load_json_from_path(path):
     with open(path, "r", encoding="utf8") as f:
         obj = json.loads(f.read())
@@ -17,6 +17,7 @@ from TrainingPipelines.ToucanTTS_MetaCheckpoint import run as meta
 from TrainingPipelines.ToucanTTS_Nancy import run as nancy
 from TrainingPipelines.finetuning_example_multilingual import run as fine_tuning_example_multilingual
 from TrainingPipelines.finetuning_example_simple import run as fine_tuning_example_simple
+from Utility.StepProfiler import enable_profiling
 
 pipeline_dict = {
     # the finetuning example
@@ -81,6 +82,11 @@ if __name__ == '__main__':
                         help="ID of a stopped wandb run to continue tracking",
                         default=None)
 
+    parser.add_argument('--profile',
+                        action="store_true",
+                        help="Whether to time the phases of every training step precisely (which slows the training down a bit) and to record a trace of a few steps with the torch profiler into the model directory.",
+                        default=False)
+
     args = parser.parse_args()
 
     if args.finetune and args.resume_checkpoint is None and not args.resume:
@@ -107,6 +113,9 @@ if __name__ == '__main__':
 
     torch.multiprocessing.set_sharing_strategy('file_system')
 
+    if args.profile:
+        enable_profiling()
+
     pipeline_dict[args.pipeline](gpu_id=args.gpu_id,
                                  resume_checkpoint=args.resume_checkpoint,
                                  resume=args.resume,